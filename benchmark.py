@@ -0,0 +1,176 @@
+from jobshop import *
+from jobshop import geneticSearch
+from jobshop.evaluator import ActiveEvaluator, Evaluator, PartialEvaluator
+from jobshop.events import MemorySink
+
+import contextlib
+import glob
+import io
+import json
+import optparse
+import os
+import platform
+import random
+import subprocess
+import sys
+import timeit
+
+"""
+Benchmark suite
+===============
+
+Runs the cost functions and the search algorithms over all instances
+with fixed seeds and time budgets and writes a JSON report which can
+be diffed between commits:
+
+    python benchmark.py -t 5 -o before.json
+    ... change something ...
+    python benchmark.py -t 5 -o after.json
+    diff before.json after.json
+
+For each instance the report contains the time per call of cost(),
+Evaluator.evaluate(), Evaluator.evaluateBatch(), normalizeSchedule(), costPartial()
+and PartialEvaluator.evaluate()
+and for each search the best makespan, its gap to lowerBound,
+the evaluations per second and the best makespan over time
+as a list of [seconds, evaluations, best].
+"""
+
+
+def timePerCall(f, args, repeat=5):
+    """Return the time per call of f(a) for a in args in microseconds."""
+    t = min(timeit.repeat(lambda: [f(a) for a in args], number=1, repeat=repeat))
+    return t / len(args) * 1e6
+
+
+def benchmarkCost(jobs, numSchedules=200):
+    """Return the time per call in microseconds of the cost functions."""
+    j = len(jobs)
+    m = len(jobs[0])
+    schedules = [randomSchedule(j, m) for _ in range(numSchedules)]
+    # partial schedules which need to be repaired by normalizeSchedule
+    partialSchedules = [[random.randrange(j) for _ in range(j*m)] for _ in range(numSchedules)]
+    evaluator = Evaluator(jobs)
+    activeEvaluator = ActiveEvaluator(jobs)
+    partialEvaluator = PartialEvaluator(jobs)
+
+    return {
+        "cost": timePerCall(lambda s: cost(jobs, s), schedules),
+        "Evaluator.evaluate": timePerCall(evaluator.evaluate, schedules),
+        "Evaluator.evaluateBatch": timePerCall(evaluator.evaluateBatch, [schedules]) / numSchedules,
+        "ActiveEvaluator.evaluate": timePerCall(activeEvaluator.evaluate, schedules),
+        "normalizeSchedule": timePerCall(lambda s: normalizeSchedule(jobs, s), partialSchedules),
+        "costPartial": timePerCall(lambda s: costPartial(jobs, s), partialSchedules),
+        "PartialEvaluator.evaluate": timePerCall(partialEvaluator.evaluate, partialSchedules),
+    }
+
+
+searches = {
+    "randomSearch": randomSearch,
+    "geneticSearchTemplate": lambda jobs, **kwargs: geneticSearchTemplate(jobs,
+            recombine=geneticSearch.recombine_simpleCrossover,
+            mutate=geneticSearch.mutate_permuteSubsequence, **kwargs),
+    "geneticSearchTemplate[active]": lambda jobs, **kwargs: geneticSearchTemplate(jobs,
+            recombine=geneticSearch.recombine_simpleCrossover,
+            mutate=geneticSearch.mutate_permuteSubsequence, decoder="active", **kwargs),
+    "simulatedAnnealingSearch": simulatedAnnealingSearch,
+    "adaptiveAnnealingSearch": adaptiveAnnealingSearch,
+    "tabuSearch": tabuSearch,
+    "dispatchSearch": dispatchSearch,
+}
+
+
+def benchmarkSearch(jobs, search, maxTime, seed):
+    """Run search with a fixed seed and return its statistics."""
+    sink = MemorySink(kinds=("improvement", "end"))
+    random.seed(seed)
+
+    # the searches print their result on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        best, schedule = search(jobs, maxTime=maxTime, callback=sink)
+
+    bound = lowerBound(jobs)
+    end = sink.events[-1]
+
+    return {
+        "best": best,
+        "gap": (best - bound) / bound,
+        "evaluations": end.evaluations,
+        "evaluations/s": end.evaluations / end.time if end.time > 0 else None,
+        "seconds": round(end.time, 3),
+        "trace": [[round(t, 3), evaluations, best] for t, evaluations, best in sink.convergence()],
+    }
+
+
+def benchmark(paths, maxTime, seed, algorithms=searches):
+    report = {
+        "seed": seed,
+        "maxTime": maxTime,
+        "python": platform.python_version(),
+        "instances": {},
+    }
+
+    try:
+        report["commit"] = subprocess.check_output(["git", "rev-parse", "HEAD"],
+                stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+
+    for path in paths:
+        jobs = loadInstance(path).toJobs()
+        # progress on stderr, the report may go to stdout
+        print("{} ({}x{})".format(path, len(jobs), len(jobs[0])), file=sys.stderr)
+
+        random.seed(seed)
+        result = {
+            "jobs": len(jobs),
+            "machines": len(jobs[0]),
+            "lowerBound": lowerBound(jobs),
+            "us/call": benchmarkCost(jobs),
+            "searches": {},
+        }
+
+        for name, search in sorted(algorithms.items()):
+            result["searches"][name] = stats = benchmarkSearch(jobs, search, maxTime, seed)
+            print("  {:<30} best {:6} gap {:6.1%} {:10.1f} evaluations/s".format(
+                    name, stats["best"], stats["gap"], stats["evaluations/s"] or 0), file=sys.stderr)
+
+        report["instances"][os.path.basename(path)] = result
+
+    return report
+
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser()
+
+    parser.add_option('-f', '--files',
+        action="store", dest="files",
+        help="Choose glob of instance files", default='instances/*')
+
+    parser.add_option('-a', '--algorithms',
+        action="store", dest="algorithms",
+        help="Choose comma separated searches: " + ", ".join(sorted(searches)), default=",".join(sorted(searches)))
+
+    parser.add_option('-t', '--time',
+        action="store", dest="time",
+        help="Choose time budget per search in seconds", default=5)
+
+    parser.add_option('-d', '--seed',
+        action="store", dest="seed",
+        help="Choose Number for Seed", default=1)
+
+    parser.add_option('-o', '--output',
+        action="store", dest="output",
+        help="Choose Path of the JSON report (default: stdout)", default=None)
+
+    options, args = parser.parse_args()
+
+    algorithms = {name: searches[name] for name in options.algorithms.split(",")}
+    report = benchmark(sorted(glob.glob(options.files)), float(options.time), int(options.seed), algorithms)
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=1, sort_keys=True))
@@ -1,5 +1,13 @@
 from .jobshop import *
 from .convert import *
+from .instance import Instance, compileInstance, cost_batch, loadInstance, parseInstance
+from .evaluator import Evaluator, ActiveEvaluator, PartialEvaluator, CachedEvaluator, DeltaEvaluator, makeEvaluator
+from .events import Event, NullSink, PrintSink, JsonLinesSink, MemorySink
+from .graph import DisjunctiveGraph
 from .randomSearch import randomSearch
 from .geneticSearch import *
-from .simulatedAnnealing import simulatedAnnealingSearch
+from .simulatedAnnealing import simulatedAnnealingSearch, adaptiveAnnealingSearch
+from .tabuSearch import tabuSearch
+from .localSearch import localSearch
+from .dispatch import dispatch, dispatchSchedules, dispatchSearch, initialSchedules
+from .reoptimize import reoptimize, remapSchedule, warmStart
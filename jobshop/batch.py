@@ -0,0 +1,88 @@
+from .jobshop import *
+from .instance import loadInstance
+from .events import MemorySink
+from .randomSearch import randomSearch
+from .geneticSearch import geneticSearchTemplate
+from .simulatedAnnealing import simulatedAnnealingSearch, adaptiveAnnealingSearch
+from .tabuSearch import tabuSearch
+from .dispatch import dispatchSearch
+
+import contextlib
+import glob
+import io
+import multiprocessing
+import os
+import random
+
+"""
+Batch solving
+=============
+
+Solve many instances with a pool of worker processes. Each worker
+solves one instance at a time, the results are yielded in the order
+in which the instances are finished.
+"""
+
+algorithms = {
+    "RS": randomSearch,
+    "GS": geneticSearchTemplate,
+    "SA": simulatedAnnealingSearch,
+    "ASA": adaptiveAnnealingSearch,
+    "TS": tabuSearch,
+    "DR": dispatchSearch,
+}
+
+
+def instancePaths(pattern):
+    """Return the instance files in a directory or matching a glob pattern."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*")
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+def solveInstance(path, algorithm, seed, maxTime, kwargs):
+    """
+    Solve the instance at path with algorithm (a key of algorithms)
+    and return a dict with the result.
+    """
+    jobs = loadInstance(path).toJobs()
+    sink = MemorySink(kinds=("end",))
+    random.seed(seed)
+
+    # only report the result
+    with contextlib.redirect_stdout(io.StringIO()):
+        best, schedule = algorithms[algorithm](jobs, maxTime=maxTime, callback=sink, **kwargs)
+
+    end = sink.events[-1]
+    return {
+        "name": os.path.basename(path),
+        "algorithm": algorithm,
+        "seed": seed,
+        "best": best,
+        "lowerBound": lowerBound(jobs),
+        "evaluations/s": end.evaluations / end.time if end.time > 0 else 0,
+        "schedule": schedule,
+    }
+
+
+def _solve(args):
+    return solveInstance(*args)
+
+
+def batchSolve(paths, algorithm, seed, maxTime, workers=None, kwargs=None):
+    """
+    Solve all instances in paths with workers processes
+    (default: number of cpus) and yield the results as they finish.
+    Every instance is solved with the same seed. kwargs are passed to
+    the search and must be picklable.
+    """
+    tasks = [(path, algorithm, seed, maxTime, kwargs or {}) for path in paths]
+
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(_solve, tasks):
+            yield result
+
+
+def formatResult(result):
+    """Format a result of solveInstance as a tab separated line."""
+    return "{name}\t{algorithm}\t{seed}\t{best}\t{lowerBound}\t{evaluations/s:.1f}".format(**result)
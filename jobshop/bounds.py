@@ -0,0 +1,175 @@
+from functools import lru_cache
+import heapq
+
+"""
+Lower bounds
+============
+
+Lower bounds for the makespan of a problem instance:
+
+    jobBound      the longest job (processing times of its tasks)
+    machineBound  the largest machine load
+    jacksonBound  one-machine relaxation: for each machine the tasks
+                  with their heads (processing time of the job before
+                  the task) and tails (after the task) are scheduled
+                  preemptively by the Jackson rule (always run the
+                  released task with the longest tail), which is
+                  optimal for the preemptive one-machine problem.
+                  Dominates jobBound and machineBound.
+    twoJobBound   the optimal makespan of each pair of jobs, computed
+                  with the geometric approach: a schedule of two jobs
+                  is a path from (0, 0) to (length of job 0, length of
+                  job 1) which moves diagonally (both jobs are
+                  processed) or parallel to an axis (one job waits)
+                  around the rectangles of the machines both jobs need.
+                  Pairs which are not longer than the jacksonBound
+                  together are skipped, which skips all pairs when the
+                  machine loads dominate. The number of pairs is O(j²),
+                  so at most pairs pairs of the longest jobs are solved.
+
+lowerBound(jobs) is the maximum of all bounds. It is cached per instance,
+each search computes it once at the start (within its maxTime).
+Every search takes a gap argument (a fraction, default 0) and stops as
+soon as its best makespan reaches targetMakespan(lowerBound(jobs), gap).
+"""
+
+
+def jobBound(jobs):
+    """Processing time of the longest job."""
+    return max(sum(time for _, time in job) for job in jobs)
+
+
+def machineBound(jobs):
+    """Largest load of a machine."""
+    load = [0]*len(jobs[0])
+    for job in jobs:
+        for machine, time in job:
+            load[machine] += time
+    return max(load)
+
+
+def _tasks(jobs):
+    """Yield (machine, head, time, tail) for every task."""
+    for job in jobs:
+        length = sum(time for _, time in job)
+        head = 0
+        for machine, time in job:
+            yield machine, head, time, length - head - time
+            head += time
+
+
+def jacksonBound(jobs):
+    """Maximum of the preemptive one-machine bounds with heads and tails."""
+    machines = [[] for _ in range(len(jobs[0]))]
+    for machine, head, time, tail in _tasks(jobs):
+        machines[machine].append((head, time, tail))
+
+    bound = 0
+    for tasks in machines:
+        tasks.sort()
+        ready = []   # (-tail, remaining time) of the released tasks
+        t = 0
+        k = 0
+        while k < len(tasks) or ready:
+            if not ready and tasks[k][0] > t:
+                t = tasks[k][0]
+            while k < len(tasks) and tasks[k][0] <= t:
+                head, time, tail = tasks[k]
+                heapq.heappush(ready, (-tail, time))
+                k += 1
+
+            # run the task with the longest tail until it is finished
+            # or the next task is released
+            tail, remaining = heapq.heappop(ready)
+            release = tasks[k][0] if k < len(tasks) else t + remaining
+            if t + remaining <= release:
+                t += remaining
+                bound = max(bound, t - tail)
+            else:
+                heapq.heappush(ready, (tail, remaining - (release - t)))
+                t = release
+
+    return bound
+
+
+def twoJobs(job0, job1):
+    """Optimal makespan of the two jobs job0 and job1 (geometric approach)."""
+    def intervals(job):
+        result = {}
+        start = 0
+        for machine, time in job:
+            result[machine] = (start, start + time)
+            start += time
+        return result, start
+
+    intervals0, length0 = intervals(job0)
+    intervals1, length1 = intervals(job1)
+
+    # rectangles (x1, x2, y1, y2) which the path must not cross,
+    # ignoring tasks without processing time keeps a lower bound
+    obstacles = [intervals0[machine] + intervals1[machine]
+            for machine in intervals0.keys() & intervals1.keys()
+            if intervals0[machine][0] < intervals0[machine][1]
+            and intervals1[machine][0] < intervals1[machine][1]]
+
+    @lru_cache(maxsize=None)
+    def shortest(x, y):
+        # move diagonally from (x, y) until the first obstacle is hit
+        hit = None
+        for x1, x2, y1, y2 in obstacles:
+            enter = max(x1 - x, y1 - y, 0)
+            if enter < min(x2 - x, y2 - y) and (hit is None or enter < hit[0]):
+                hit = (enter, x1, x2, y1, y2)
+
+        if hit is None:
+            return max(length0 - x, length1 - y)
+
+        # pass below (job 1 waits) or left (job 0 waits) of the obstacle
+        _, x1, x2, y1, y2 = hit
+        best = None
+        if y1 >= y:
+            best = max(x2 - x, y1 - y) + shortest(x2, y1)
+        if x1 >= x:
+            c = max(x1 - x, y2 - y) + shortest(x1, y2)
+            best = c if best is None else min(best, c)
+        return best
+
+    return shortest(0, 0)
+
+
+def twoJobBound(jobs, bound=0, pairs=1000):
+    """
+    Maximum of bound and the optimal makespans of pairs of jobs.
+    Pairs which are not longer than bound together are skipped,
+    of the others at most pairs pairs of the longest jobs are solved.
+    """
+    lengths = sorted(((sum(time for _, time in job), job) for job in jobs),
+            key=lambda x: x[0], reverse=True)
+    bound = max(bound, jobBound(jobs))
+
+    for i, (length0, job0) in enumerate(lengths):
+        for length1, job1 in lengths[i + 1:]:
+            if length0 + length1 <= bound:
+                # the remaining jobs are shorter
+                break
+            if pairs == 0:
+                return bound
+            bound = max(bound, twoJobs(job0, job1))
+            pairs -= 1
+
+    return bound
+
+
+@lru_cache(maxsize=64)
+def _lowerBound(jobs):
+    return twoJobBound(jobs, jacksonBound(jobs))
+
+
+def lowerBound(jobs):
+    """Returns a lower bound for the problem instance jobs (cached)."""
+    return _lowerBound(tuple(tuple(job) for job in jobs))
+
+
+def targetMakespan(bound, gap=0):
+    """Makespan within gap (a fraction, e.g. 0.01) of the lower bound bound."""
+    return bound * (1 + gap)
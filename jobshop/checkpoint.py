@@ -0,0 +1,59 @@
+from collections import namedtuple
+import json
+import os
+import random
+
+import numpy as np
+
+"""
+Checkpoints
+===========
+
+Long running searches (geneticSearchTemplate, simulatedAnnealingSearch
+and adaptiveAnnealingSearch) write a checkpoint after each batch of
+iterations and when they are interrupted (set checkpoint to a path)
+and continue from it where they left off (set resume to the result of
+loadCheckpoint). The annealing searches save the temperature and the
+current schedule of their running restart or chain too.
+
+A checkpoint is a compressed .npz file with
+
+    meta     JSON object with the algorithm name and the counters,
+             the best makespan, the elapsed time, ...
+    random   the state of random (random.getstate()) as an int array
+    ...      int arrays of the search state, e.g. the population of
+             the genetic search or the best schedule
+
+It is written to a temporary file first and then renamed, so a
+preempted process never leaves a broken checkpoint behind.
+"""
+
+Checkpoint = namedtuple("Checkpoint", "algorithm meta arrays randomState")
+
+
+def saveCheckpoint(path, algorithm, meta, randomState=None, **arrays):
+    """
+    Save the state of a search and of random to path.
+    Set randomState to save a state of random taken earlier
+    together with the state of the search (random.getstate()).
+    """
+    version, state, gauss = randomState or random.getstate()
+    meta = dict(meta, algorithm=algorithm, randomVersion=version, randomGauss=gauss)
+
+    tmp = path + ".tmp{}".format(os.getpid())
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, meta=np.array(json.dumps(meta)),
+                random=np.array(state, dtype=np.uint32),
+                **{name: np.asarray(a, dtype=np.int32) for name, a in arrays.items()})
+    os.replace(tmp, path)
+
+
+def loadCheckpoint(path):
+    """Load a checkpoint written by saveCheckpoint as a Checkpoint."""
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        arrays = {name: data[name] for name in data.files if name not in ("meta", "random")}
+        state = tuple(int(i) for i in data["random"])
+
+    randomState = (meta.pop("randomVersion"), state, meta.pop("randomGauss"))
+    return Checkpoint(meta.pop("algorithm"), meta, arrays, randomState)
@@ -0,0 +1,237 @@
+from .jobshop import *
+from .evaluator import Evaluator
+from .events import PrintSink, event
+
+import heapq
+import random
+import time
+
+"""
+Dispatching rules
+=================
+
+Constructive heuristics which build an active schedule task by task
+(Giffler-Thompson): of all tasks which are ready (the next task of
+each job) take the one which can be completed first, at time C on
+machine M. Every ready task on M which can start before C conflicts
+with it, a priority rule chooses which of them is scheduled next:
+
+    SPT     shortest processing time
+    LPT     longest processing time
+    MWKR    most work remaining (in the job, also called LRPT)
+    MOPNR   most operations remaining
+    FIFO    job which is ready first
+
+The ready tasks are kept in a heap by completion time and in a heap
+per machine by priority, so a schedule is built in O(n log n) for
+n = j*m tasks in the usual case. The result is the schedule
+(permutation) of the tasks in dispatch order, its cost() is the
+makespan of the active schedule.
+
+GRASP: with rcl > 1 the rule chooses randomly among the rcl best
+conflicting tasks (restricted candidate list), which gives different
+good schedules for repeated calls.
+"""
+
+# priority of a task (lower is dispatched first) from its processing time,
+# the remaining work and operations of its job (including the task)
+# and the time the task became ready
+rules = {
+    "SPT": lambda time, work, operations, ready: time,
+    "LPT": lambda time, work, operations, ready: -time,
+    "MWKR": lambda time, work, operations, ready: -work,
+    "LRPT": lambda time, work, operations, ready: -work,
+    "MOPNR": lambda time, work, operations, ready: -operations,
+    "FIFO": lambda time, work, operations, ready: ready,
+}
+
+# the rules in the order in which dispatchSchedules uses them
+deterministicRules = ["MWKR", "MOPNR", "SPT", "LPT", "FIFO"]
+
+
+def dispatch(jobs, rule="MWKR", rcl=1):
+    """
+    Return the schedule built with the dispatching rule (a key of rules).
+    Set rcl > 1 to choose randomly among the rcl best tasks (GRASP).
+    """
+    j = len(jobs)
+    m = len(jobs[0])
+    priority = rules[rule]
+
+    # remaining work of each job including task
+    work = []
+    for job in jobs:
+        remaining = sum(time for _, time in job)
+        work.append([])
+        for _, time in job:
+            work[-1].append(remaining)
+            remaining -= time
+
+    tj = [0]*j   # end of previous task for each job
+    tm = [0]*m   # end of previous task on each machine
+    ij = [0]*j   # task to schedule next for each job
+
+    ready = []                      # (completion, job, task) of the ready tasks
+    queues = [[] for _ in range(m)] # (priority, job) of the ready tasks on each machine
+
+    def push(i):
+        machine, time = jobs[i][ij[i]]
+        heapq.heappush(ready, (max(tj[i], tm[machine]) + time, i, ij[i]))
+        heapq.heappush(queues[machine], (priority(time, work[i][ij[i]], m - ij[i], tj[i]), i))
+
+    for i in range(j):
+        push(i)
+
+    schedule = []
+    while ready:
+        completion, i, task = heapq.heappop(ready)
+        if task != ij[i]:
+            # the task was already dispatched
+            continue
+        machine, time = jobs[i][task]
+        if max(tj[i], tm[machine]) + time != completion:
+            # the machine was busy in the meantime, the completion is later
+            heapq.heappush(ready, (max(tj[i], tm[machine]) + time, i, task))
+            continue
+
+        # conflicting tasks on the machine in the order of priority
+        queue = queues[machine]
+        candidates = []
+        skipped = []
+        while queue and len(candidates) < rcl:
+            entry = heapq.heappop(queue)
+            k = entry[1]
+            if k == i or max(tj[k], tm[machine]) < completion:
+                candidates.append(entry)
+            else:
+                skipped.append(entry)
+
+        chosen = candidates.pop(random.randrange(len(candidates)) if len(candidates) > 1 else 0)
+        for entry in candidates + skipped:
+            heapq.heappush(queue, entry)
+
+        k = chosen[1]
+        if k != i:
+            # task of i is still ready
+            heapq.heappush(ready, (completion, i, task))
+        _, time = jobs[k][ij[k]]
+        end = max(tj[k], tm[machine]) + time
+        tj[k] = end
+        tm[machine] = end
+        ij[k] += 1
+        schedule.append(k)
+
+        if ij[k] < m:
+            push(k)
+
+    return schedule
+
+
+def dispatchSchedules(jobs, count=None, rcl=3):
+    """
+    Return count schedules (default: one per deterministic rule):
+    one for each deterministic rule, the rest with randomly chosen
+    rules and the restricted candidate list rcl (GRASP).
+    """
+    if count is None:
+        count = len(deterministicRules)
+    schedules = [dispatch(jobs, rule) for rule in deterministicRules[:count]]
+    while len(schedules) < count:
+        schedules.append(dispatch(jobs, random.choice(deterministicRules), rcl))
+    return schedules
+
+
+def initialSchedules(initial, jobs=None, count=None):
+    """
+    Return initial (None, a schedule or a list of schedules) as
+    a list of copies of the schedules to warm-start a search with.
+    All searches but dispatchSearch take such an initial argument.
+    initial = "dispatch" means count schedules of jobs built with
+    dispatching rules (see dispatchSchedules).
+    """
+    if initial is None or len(initial) == 0:
+        return []
+    if isinstance(initial, str):
+        if initial != "dispatch":
+            raise ValueError('initial must be a schedule, a list of schedules or "dispatch"')
+        return dispatchSchedules(jobs, count)
+    if not hasattr(initial[0], "__len__"):
+        initial = [initial]
+    return [[int(i) for i in schedule] for schedule in initial]
+
+
+def dispatchSearch(jobs, maxTime=None, rcl=3, callback=None, gap=0):
+    """
+    Evaluate the deterministic dispatching rules and then GRASP
+    schedules (see dispatchSchedules) until maxTime is over or
+    a KeyboardInterrupt (Ctrl+C) is raised.
+    """
+
+    numExperiments = 10     # experiments performed per loop
+                            # used to balance logging output
+    solutions = []   # list of (time, schedule) with decreasing time
+
+    t0 = time.time()
+    totalExperiments = 0
+    callback = callback or PrintSink()
+    evaluator = Evaluator(jobs)
+    bound = lowerBound(jobs)
+    target = targetMakespan(bound, gap)
+
+    def candidates():
+        for rule in deterministicRules:
+            yield dispatch(jobs, rule)
+        while True:
+            yield dispatch(jobs, random.choice(deterministicRules), rcl)
+
+    schedules = candidates()
+
+    # the first rule, so an interrupted search has a result
+    schedule = next(schedules)
+    best = evaluator.evaluate(schedule)
+    solutions.append((best, schedule))
+    callback(event("improvement", "dispatchSearch", t0, evaluator.evaluations, best, schedule))
+    totalExperiments = 1
+
+    while True:
+        try:
+            start = time.time()
+            if best <= target:
+                raise OutOfTime("Lower bound reached")
+
+            for i in range(numExperiments):
+                schedule = next(schedules)
+                c = evaluator.evaluate(schedule)
+
+                if c < best:
+                    best = c
+                    solutions.append((c, schedule))
+                    callback(event("improvement", "dispatchSearch", t0, evaluator.evaluations, c, schedule))
+                    if best <= target:
+                        raise OutOfTime("Lower bound reached")
+
+            totalExperiments += numExperiments
+            if maxTime and time.time() - t0 > maxTime:
+                raise OutOfTime("Time is over")
+
+            callback(event("batch", "dispatchSearch", t0, evaluator.evaluations, best, solutions[-1][1]))
+
+            t = time.time() - start
+
+            # Make outputs appear about every 3 seconds.
+            if t > 4:
+                numExperiments = max(numExperiments // 2, 1)
+            elif t < 1.5:
+                numExperiments *= 2
+
+        except (KeyboardInterrupt, OutOfTime) as e:
+            callback(event("end", "dispatchSearch", t0, evaluator.evaluations, best, solutions[-1][1]))
+
+            print()
+            print("================================================")
+            print("Best time:", best, "  (lower bound {})".format(bound))
+            print("Best solution:")
+            print(solutions[-1][1])
+            print("Found in {:} schedules in {:.1f}s".format(totalExperiments, time.time() - t0))
+
+            return solutions[-1]
@@ -0,0 +1,518 @@
+from .instance import compileInstance, cost_batch
+from .jobshop import completion, normalizeSchedule
+
+from bisect import bisect_right
+from collections import OrderedDict
+
+"""
+Evaluators
+==========
+
+Helpers to compute the makespan of schedules faster than
+calling cost() from scratch for every candidate.
+
+An Evaluator is bound to a problem instance. It stores the instance
+as flat lists indexed by job*m + task and reuses its scratch buffers
+for tj, tm and ij in every call of evaluate().
+
+Incremental evaluation
+----------------------
+
+Neighboring schedules (e.g. after swapping two instructions at
+positions a < b) share the prefix schedule[:a] with the current
+schedule. The state of the cost function (tj, tm, ij) after
+processing this prefix is the same for both, so only the
+instructions from position a on have to be replayed.
+
+A DeltaEvaluator stores the state of the current schedule every
+`stride` positions. To score a candidate which differs from the
+current schedule only at positions >= a it restores the nearest
+checkpoint before a and replays from there.
+
+To find improving neighbors only makespans below a bound (e.g. the
+cost of the current schedule) are of interest. The end of a task plus
+the remaining processing time of its job or of its machine is a lower
+bound of the makespan, so score(candidate, a, bound) stops the replay
+as soon as it reaches bound.
+
+Caching
+-------
+
+GA populations contain many identical individuals, e.g. the
+survivors of select_best or children of recombine_first which are
+not mutated. A CachedEvaluator remembers the makespans of the
+maxSize most recently evaluated schedules.
+Ideally the cache would be keyed by the canonical (semi-active)
+schedule since many permutations result in the same schedule,
+but computing it is as expensive as cost() itself. Hashing the
+permutation is done in C and much faster.
+
+Active schedules
+----------------
+
+cost() computes a semi-active schedule: every task is appended
+to its machine after the previous task on this machine. An
+ActiveEvaluator instead inserts a task into the first idle gap of
+its machine (after the end of the previous task of the job) which is
+long enough. The idle gaps are found by bisection in the sorted busy
+intervals of the machine. Every permutation is decoded to an active
+schedule whose makespan is at most the one computed by cost().
+
+The lookup is not O(log n): after the bisection the gaps which are
+too short are scanned, and the interval is inserted with list.insert
+(a memmove). For random schedules the scan passes about 1 gap per
+task at 15x15, 4 at 100x20 and 45 at 1000x20. A balanced tree with the
+maximum gap in each subtree finds the gap in O(log n), but in Python
+a treap was 11x slower at 15x15, 7x at 100x20 and still 1.8x slower
+at 1000x20 than the bisection and scan over the C-level lists.
+
+Since cost() does not reproduce the makespan of the active decoder,
+the searches store Evaluator.decode(schedule) instead: the tasks
+in the order of their start times in the active schedule.
+
+Partial schedules
+-----------------
+
+A PartialEvaluator evaluates partial schedules (see jobshop.py) like
+costPartial: surplus instructions are ignored and unfinished jobs are
+completed in the same pass. Its decode() returns the normalized
+schedule. With this decoder the GA can recombine partial schedules
+(see recombine_partialCrossover) without repairing them first.
+
+Use makeEvaluator(jobs, decoder, cache) to select an evaluator.
+"""
+
+
+class Evaluator:
+    """
+    Makespan evaluation bound to a problem instance jobs.
+
+    evaluate(schedule) computes the same value as cost(jobs, schedule),
+    evaluateBatch(schedules) the same as cost_batch. The number of
+    evaluated schedules is counted in evaluations.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.j = len(jobs)
+        self.m = len(jobs[0])
+
+        # flattened lookup tables indexed by job*m + task
+        self.machines = [machine for job in jobs for machine, _ in job]
+        self.times = [time for job in jobs for _, time in job]
+        self.first = list(range(0, self.j * self.m, self.m))
+
+        # scratch buffers reused in every call
+        self.tj = [0]*self.j    # end of previous task for each job
+        self.tm = [0]*self.m    # end of previous task on each machine
+        self.next = [0]*self.j  # job*m + ij[job] for each job
+        self.zj = [0]*self.j
+        self.zm = [0]*self.m
+
+        self.instance = compileInstance(jobs)
+        self.evaluations = 0
+
+    def evaluate(self, schedule):
+        """Calculate the makespan of schedule."""
+        self.evaluations += 1
+
+        tj = self.tj
+        tm = self.tm
+        next = self.next
+        tj[:] = self.zj
+        tm[:] = self.zm
+        next[:] = self.first
+
+        machines = self.machines
+        times = self.times
+
+        for i in schedule:
+            task = next[i]
+            next[i] = task + 1
+            machine = machines[task]
+
+            # inlined max() which is considerably faster
+            start = tj[i]
+            if tm[machine] > start:
+                start = tm[machine]
+            end = start + times[task]
+            tj[i] = end
+            tm[machine] = end
+
+        return max(tm)
+
+    def evaluateBatch(self, schedules):
+        """Calculate the makespans of a list of schedules as a list."""
+        self.evaluations += len(schedules)
+        return cost_batch(self.instance, schedules).tolist()
+
+    def decode(self, schedule):
+        """
+        Return a copy of schedule for which cost() computes
+        the makespan computed by this evaluator.
+        """
+        return list(schedule)
+
+
+class ActiveEvaluator(Evaluator):
+    """
+    Evaluator which decodes schedules to active schedules
+    by inserting tasks into idle gaps of the machines
+    (bisection and a scan of the gaps, see above).
+    """
+
+    def timetable(self, schedule):
+        """Return the start time of each task (in schedule order) and the makespan."""
+        tj = self.tj
+        next = self.next
+        tj[:] = self.zj
+        next[:] = self.first
+
+        machines = self.machines
+        times = self.times
+
+        # sorted busy intervals of each machine
+        starts = [[] for _ in range(self.m)]
+        ends = [[] for _ in range(self.m)]
+        timetable = []
+
+        for i in schedule:
+            task = next[i]
+            next[i] = task + 1
+            machine = machines[task]
+            time = times[task]
+            S = starts[machine]
+            E = ends[machine]
+
+            # first busy interval ending after the job is ready,
+            # the gap before it starts at the latest at tj[i]
+            start = tj[i]
+            k = bisect_right(E, start)
+            while k < len(S) and start + time > S[k]:
+                start = E[k]
+                k += 1
+
+            S.insert(k, start)
+            E.insert(k, start + time)
+            tj[i] = start + time
+            timetable.append(start)
+
+        return timetable, max(E[-1] for E in ends if E)
+
+    def evaluate(self, schedule):
+        """Calculate the makespan of the active schedule of schedule."""
+        self.evaluations += 1
+        return self.timetable(schedule)[1]
+
+    def evaluateBatch(self, schedules):
+        # not self.evaluate, which is the cached one in CachedActiveEvaluator
+        self.evaluations += len(schedules)
+        return [self.timetable(s)[1] for s in schedules]
+
+    def decode(self, schedule):
+        timetable, _ = self.timetable(schedule)
+        # sort is stable, ties keep the order of schedule
+        order = sorted(range(len(schedule)), key=timetable.__getitem__)
+        return [schedule[k] for k in order]
+
+
+class PartialEvaluator(Evaluator):
+    """
+    Evaluator for partial schedules, unfinished jobs are completed
+    with the priority rule (see completion()).
+    """
+
+    def __init__(self, jobs, rule="block"):
+        super().__init__(jobs)
+        self.rule = rule
+        self.last = list(range(self.m, (self.j + 1) * self.m, self.m))
+
+    def makespan(self, schedule):
+        """Return the makespan of the partial schedule (not counted in evaluations)."""
+        tj = self.tj
+        tm = self.tm
+        next = self.next
+        tj[:] = self.zj
+        tm[:] = self.zm
+        next[:] = self.first
+
+        machines = self.machines
+        times = self.times
+        last = self.last
+
+        for i in schedule:
+            task = next[i]
+            if task == last[i]:
+                # surplus instruction of a finished job
+                continue
+            next[i] = task + 1
+            machine = machines[task]
+
+            start = tj[i]
+            if tm[machine] > start:
+                start = tm[machine]
+            end = start + times[task]
+            tj[i] = end
+            tm[machine] = end
+
+        # tj and tm are kept up to date for the rule "est"
+        ij = [task - first for task, first in zip(next, self.first)]
+        for i in completion(self.jobs, ij, self.rule, tj, tm):
+            task = next[i]
+            next[i] = task + 1
+            machine = machines[task]
+            end = max(tj[i], tm[machine]) + times[task]
+            tj[i] = end
+            tm[machine] = end
+
+        return max(tm)
+
+    def evaluate(self, schedule):
+        """Calculate the makespan of the partial schedule."""
+        self.evaluations += 1
+        return self.makespan(schedule)
+
+    def evaluateBatch(self, schedules):
+        self.evaluations += len(schedules)
+        return [self.makespan(s) for s in schedules]
+
+    def decode(self, schedule):
+        return normalizeSchedule(self.jobs, schedule, self.rule)
+
+
+class CachedEvaluator(Evaluator):
+    """
+    Evaluator with a LRU cache of the makespans of the maxSize
+    most recently evaluated schedules.
+    evaluations counts all requests, hits and misses the cache hits
+    and the schedules actually evaluated.
+    """
+
+    def __init__(self, jobs, maxSize=10000):
+        super().__init__(jobs)
+        self.maxSize = maxSize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hitRate(self):
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0
+
+    def _lookup(self, key):
+        c = self.cache.get(key)
+        if c is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+        return c
+
+    def _store(self, key, c):
+        self.cache[key] = c
+        if len(self.cache) > self.maxSize:
+            self.cache.popitem(last=False)
+
+    def evaluate(self, schedule):
+        key = tuple(schedule)
+        c = self._lookup(key)
+        if c is None:
+            c = super().evaluate(schedule)
+            self.misses += 1
+            self._store(key, c)
+        else:
+            self.evaluations += 1
+        return c
+
+    def evaluateBatch(self, schedules):
+        keys = [tuple(s) for s in schedules]
+        costs = [self._lookup(key) for key in keys]
+
+        missing = [i for i, c in enumerate(costs) if c is None]
+        if missing:
+            computed = super().evaluateBatch([schedules[i] for i in missing])
+            for i, c in zip(missing, computed):
+                costs[i] = c
+                self._store(keys[i], c)
+            self.misses += len(missing)
+
+        self.evaluations += len(schedules) - len(missing)
+        return costs
+
+
+class CachedActiveEvaluator(CachedEvaluator, ActiveEvaluator):
+    """CachedEvaluator for active schedules."""
+
+
+class CachedPartialEvaluator(CachedEvaluator, PartialEvaluator):
+    """CachedEvaluator for partial schedules."""
+
+
+# evaluator without and with cache for each decoder
+decoders = {
+    "semiactive": (Evaluator, CachedEvaluator),
+    "active": (ActiveEvaluator, CachedActiveEvaluator),
+    "partial": (PartialEvaluator, CachedPartialEvaluator),
+}
+
+
+def makeEvaluator(jobs, decoder="semiactive", cache=None):
+    """
+    Return an evaluator for the decoder "semiactive" (like cost()),
+    "active" (see ActiveEvaluator) or "partial" (see PartialEvaluator),
+    optionally with a cache of the given size (see CachedEvaluator).
+    """
+    if decoder not in decoders:
+        raise ValueError("Unknown decoder {}".format(decoder))
+    if cache:
+        return decoders[decoder][1](jobs, cache)
+    return decoders[decoder][0](jobs)
+
+
+class DeltaEvaluator(Evaluator):
+    """
+    Incremental makespan evaluation relative to a current schedule.
+
+    Usage:
+        evaluator = DeltaEvaluator(jobs, schedule)
+        c = evaluator.score(candidate, a)   # candidate[:a] == schedule[:a]
+        evaluator.accept(candidate, a)      # candidate is the new current schedule
+    """
+
+    def __init__(self, jobs, schedule, stride=None):
+        super().__init__(jobs)
+
+        # Taking a checkpoint costs O(j + m), so this stride makes the
+        # total checkpointing effort about as large as one cost() call.
+        self.stride = stride or self.j + self.m
+
+        # processing time of the tasks of the job after job*m + task
+        self.tails = []
+        for job in jobs:
+            remaining = sum(time for _, time in job)
+            for _, time in job:
+                remaining -= time
+                self.tails.append(remaining)
+
+        self.reset(schedule)
+
+    def reset(self, schedule):
+        """Make schedule the current schedule and evaluate it from scratch."""
+        self.schedule = list(schedule)
+        self.checkpoints = [([0]*self.j, [0]*self.m, [0]*self.j)]
+        self.loads = {}
+        self.cost = self._replay(0, record=True)
+        return self.cost
+
+    def _restore(self, a):
+        """Return copies of (tj, tm, ij, position) for the checkpoint at or before a."""
+        c = min(a // self.stride, len(self.checkpoints) - 1)
+        tj, tm, ij = self.checkpoints[c]
+        return tj[:], tm[:], ij[:], c * self.stride
+
+    def _replay(self, a, schedule=None, record=False):
+        """
+        Replay schedule (default: the current one) from position a
+        and return the makespan.
+        If record is set, the checkpoints from a on are updated.
+        """
+        if schedule is None:
+            schedule = self.schedule
+
+        tj, tm, ij, first = self._restore(a)
+        if record:
+            del self.checkpoints[first // self.stride + 1:]
+            self.loads = {c: load for c, load in self.loads.items() if c <= first // self.stride}
+
+        self.evaluations += 1
+
+        m = self.m
+        machines = self.machines
+        times = self.times
+        stride = self.stride
+
+        for k in range(first, len(schedule)):
+            if record and k % stride == 0 and k > first:
+                self.checkpoints.append((tj[:], tm[:], ij[:]))
+
+            i = schedule[k]
+            task = i*m + ij[i]
+            ij[i] += 1
+            machine = machines[task]
+
+            start = tj[i]
+            if tm[machine] > start:
+                start = tm[machine]
+            end = start + times[task]
+            tj[i] = end
+            tm[machine] = end
+
+        return max(tm)
+
+    def _load(self, c):
+        """Remaining processing time on each machine after checkpoint c (cached)."""
+        if c not in self.loads:
+            load = [0]*self.m
+            _, _, ij = self.checkpoints[c]
+            for i in range(self.j):
+                for task in range(i*self.m + ij[i], (i+1)*self.m):
+                    load[self.machines[task]] += self.times[task]
+            self.loads[c] = load
+        return self.loads[c]
+
+    def _replayBound(self, a, schedule, bound):
+        """
+        Replay schedule from position a like _replay, but return a lower
+        bound of the makespan (which is >= bound) as soon as it reaches bound.
+        """
+        tj, tm, ij, first = self._restore(a)
+        load = self._load(first // self.stride)[:]
+        self.evaluations += 1
+
+        m = self.m
+        machines = self.machines
+        times = self.times
+        tails = self.tails
+
+        for k in range(first, len(schedule)):
+            i = schedule[k]
+            task = i*m + ij[i]
+            ij[i] += 1
+            machine = machines[task]
+
+            start = tj[i]
+            if tm[machine] > start:
+                start = tm[machine]
+            end = start + times[task]
+            # the job and the machine still have to process their remaining tasks
+            load[machine] -= times[task]
+            if end + tails[task] >= bound:
+                return end + tails[task]
+            if end + load[machine] >= bound:
+                return end + load[machine]
+            tj[i] = end
+            tm[machine] = end
+
+        return max(tm)
+
+    def score(self, schedule, a=0, bound=None):
+        """
+        Return the makespan of schedule, which must agree with
+        the current schedule on all positions before a.
+        If bound is set, makespans >= bound are not computed exactly,
+        the result is then some value >= bound.
+        """
+        if bound is None:
+            return self._replay(a, schedule)
+        return self._replayBound(a, schedule, bound)
+
+    def accept(self, schedule, a=0):
+        """
+        Make schedule the current schedule. It must agree with the
+        previous current schedule on all positions before a.
+        If schedule is the current schedule modified in place, no
+        copy is made.
+        """
+        if schedule is not self.schedule:
+            self.schedule = list(schedule)
+        self.cost = self._replay(a, record=True)
+        return self.cost
@@ -0,0 +1,100 @@
+from collections import namedtuple
+import json
+import sys
+import time
+
+"""
+Progress events
+===============
+
+The search algorithms report their progress by calling
+callback(event) with an Event
+
+    kind         "improvement" (a new best solution was found),
+                 "batch" (after each batch of iterations, about every
+                 3 seconds) or "end" (the search terminated)
+    algorithm    name of the search algorithm
+    time         seconds since the start of the search
+    evaluations  number of evaluated schedules so far
+    best         best makespan so far
+    schedule     best schedule so far (do not modify)
+
+Every search takes a callback argument, any callable can be used.
+Without a callback the progress is printed. This module provides the sinks
+NullSink (ignore events), PrintSink (the default, prints the progress
+after each batch), JsonLinesSink (write one JSON object per event)
+and MemorySink (collect events in a list).
+"""
+
+Event = namedtuple("Event", "kind algorithm time evaluations best schedule")
+
+
+def event(kind, algorithm, t0, evaluations, best, schedule):
+    """Create an Event for a search started at time t0."""
+    return Event(kind, algorithm, time.time() - t0, evaluations, best, schedule)
+
+
+class NullSink:
+    """Ignore all events."""
+
+    def __call__(self, event):
+        pass
+
+
+class PrintSink:
+    """Print the best makespan and the evaluations/s after each batch."""
+
+    def __init__(self, file=None):
+        self.file = file
+        self.lastTime = 0
+        self.lastEvaluations = 0
+
+    def __call__(self, event):
+        if event.kind != "batch":
+            return
+
+        t = event.time - self.lastTime
+        if t > 0:
+            print("Best:", event.best, "({:.1f} Evaluations/s, {:.1f} s)".format(
+                    (event.evaluations - self.lastEvaluations)/t, event.time),
+                    file=self.file or sys.stdout)
+
+        self.lastTime = event.time
+        self.lastEvaluations = event.evaluations
+
+
+class JsonLinesSink:
+    """
+    Write each event as a JSON object on one line to file
+    (a path or a file object). Set kinds to filter the events,
+    e.g. kinds=("improvement", "end").
+    """
+
+    def __init__(self, file, kinds=None):
+        if isinstance(file, str):
+            file = open(file, "a")
+        self.file = file
+        self.kinds = kinds
+
+    def __call__(self, event):
+        if self.kinds and event.kind not in self.kinds:
+            return
+        self.file.write(json.dumps(event._asdict()) + "\n")
+        self.file.flush()
+
+
+class MemorySink:
+    """Collect events (optionally only those of the given kinds) in events."""
+
+    def __init__(self, kinds=None):
+        self.kinds = kinds
+        self.events = []
+
+    def __call__(self, event):
+        if self.kinds and event.kind not in self.kinds:
+            return
+        self.events.append(event)
+
+    def convergence(self):
+        """Return the best makespan over time as a list of (time, evaluations, best)."""
+        return [(e.time, e.evaluations, e.best) for e in self.events if e.kind != "batch"]
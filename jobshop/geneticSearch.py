@@ -1,23 +1,54 @@
 from .jobshop import *
-
+from .evaluator import DeltaEvaluator, makeEvaluator
+from .dispatch import initialSchedules
+from .localSearch import localSearch
+from .events import PrintSink, event
+from .checkpoint import saveCheckpoint
+
+import heapq
+import multiprocessing
+from operator import itemgetter
+import queue
 import random
 import time
 
+import numpy as np
+
 
 def select_best(jobs, population, fraction=0.5):
     """Keep best fraction (in [0, 1]) of population"""
-    population.sort()
     # get an even number of individuals
     # return population[:(populationSize//4) * 2]
     # select best half
-    return population[:max(int(fraction * len(population)), 1)]
-
+    # partial selection in O(n log k) instead of sorting the population
+    return heapq.nsmallest(max(int(fraction * len(population)), 1), population, key=itemgetter(0))
 
-def select_tournament(jobs, population, tournament_size=10, p=0.9):
-    # TODO: implement tournament Selection (https://en.wikipedia.org/wiki/Tournament_selection)
-    raise(NotImplementedError("Implement tournament selection"))
 
+def select_tournament(jobs, population, tournament_size=10, p=0.9, fraction=0.5):
+    """
+    Tournament selection (https://en.wikipedia.org/wiki/Tournament_selection):
+    Select fraction of population by tournaments between tournament_size
+    random individuals. The i-th best individual of a tournament wins
+    with probability p*(1-p)^i.
+    """
     nextGen = []
+    tournament_size = min(tournament_size, len(population))
+
+    for _ in range(max(int(fraction * len(population)), 1)):
+        # sample indices in O(k) and sort only the contestants
+        contestants = sorted(random.sample(range(len(population)), tournament_size),
+                key=lambda i: population[i][0])
+
+        winner = contestants[-1]
+        for i in contestants:
+            if random.random() < p:
+                winner = i
+                break
+
+        c, s = population[winner]
+        # copy since an individual may win several tournaments
+        # and individuals are mutated in place
+        nextGen.append((c, s[:]))
 
     return nextGen
 
@@ -59,6 +90,119 @@ def recombine_simpleCrossover(jobs, s1, s2):
     return normalizeSchedule(jobs, s1[:cut] + s2[cut:])
 
 
+def recombine_partialCrossover(jobs, s1, s2):
+    """
+    Classic crossover without repair, the child is a partial schedule.
+    Use it with decoder="partial" which evaluates and completes it in
+    a single pass (see PartialEvaluator).
+    """
+    cut = random.randint(0, len(s1) - 1)
+    return s1[:cut] + s2[cut:]
+
+
+def _checkDecoder(recombine, decoder):
+    """Raise a ValueError if recombine creates schedules decoder can not evaluate."""
+    if getattr(recombine, "func", recombine) is recombine_partialCrossover and decoder != "partial":
+        raise ValueError('recombine_partialCrossover requires decoder="partial"')
+
+
+def recombine_jox(jobs, s1, s2):
+    """
+    Job-based order crossover (JOX): the genes of a random subset of jobs
+    keep their positions from s1, the other positions are filled with the
+    remaining genes in the order of s2. The child is a valid schedule.
+    """
+    keep = [random.random() < 0.5 for _ in range(len(jobs))]
+    child = [0] * len(s1)
+
+    k = 0   # next gene of s2
+    for i, g in enumerate(s1):
+        if keep[g]:
+            child[i] = g
+        else:
+            while keep[s2[k]]:
+                k += 1
+            child[i] = s2[k]
+            k += 1
+
+    return child
+
+
+def recombine_gox(jobs, s1, s2):
+    """
+    Generalized order crossover (GOX, Bierwirth 1995): a substring of
+    operations (job, occurrence) of s1 is inserted into s2 where its
+    first operation occurs in s2 and these operations are removed from
+    the rest of s2. The child is a valid schedule.
+    """
+    j = len(jobs)
+    l = len(s1)
+    a = random.randint(0, l - 1)
+    b = random.randint(a + 1, min(l, a + max(l // 2, 1)))
+
+    # the substring contains the occurrences lo[g] <= k < hi[g] of job g
+    lo = [0] * j
+    for g in s1[:a]:
+        lo[g] += 1
+    hi = lo[:]
+    for g in s1[a:b]:
+        hi[g] += 1
+
+    child = [0] * l
+    occurrence = [0] * j
+    i = 0
+    inserted = False
+    for g in s2:
+        k = occurrence[g]
+        occurrence[g] += 1
+        if lo[g] <= k < hi[g]:
+            if not inserted:
+                child[i:i + b - a] = s1[a:b]
+                i += b - a
+                inserted = True
+        else:
+            child[i] = g
+            i += 1
+
+    return child
+
+
+def recombine_ppx(jobs, s1, s2):
+    """
+    Precedence preservative crossover (PPX, Bierwirth et al. 1996):
+    Take the next gene alternately (at random) from s1 or s2 and delete
+    its first occurrence in the other parent. The relative order of the
+    operations of each parent is preserved. The child is a valid schedule.
+    """
+    j = len(jobs)
+    l = len(s1)
+    choices = random.getrandbits(l)
+    # number of pending deletions per job in each parent
+    skip1 = [0] * j
+    skip2 = [0] * j
+    i1 = i2 = 0
+    child = [0] * l
+
+    for i in range(l):
+        if choices >> i & 1:
+            while skip1[s1[i1]]:
+                skip1[s1[i1]] -= 1
+                i1 += 1
+            g = s1[i1]
+            i1 += 1
+            skip2[g] += 1
+        else:
+            while skip2[s2[i2]]:
+                skip2[s2[i2]] -= 1
+                i2 += 1
+            g = s2[i2]
+            i2 += 1
+            skip1[g] += 1
+        child[i] = g
+
+    return child
+
+
 def mutate_none(jobs, s):
     """Dummy select."""
     pass
@@ -85,80 +229,139 @@ def mutate_swap(jobs, s, num_swaps=5):
         s[a], s[b] = s[b], s[a]
 
 
+# DeltaEvaluator reused by mutate_localSearch for the same instance.
+_localSearchEvaluator = None
+
+
+def mutate_localSearch(jobs, s, neighbourhoods="swap", maxSteps=1, maxDistance=None, strategy="first"):
+    """
+    Memetic mutation: improve s in place by local search
+    (see localSearch.py), by default one first-improving swap.
+    """
+    global _localSearchEvaluator
+    if _localSearchEvaluator is None or _localSearchEvaluator.jobs is not jobs:
+        _localSearchEvaluator = DeltaEvaluator(jobs, s)
+
+    _, s[:] = localSearch(jobs, s, neighbourhoods, strategy,
+            maxDistance=maxDistance, maxSteps=maxSteps, evaluator=_localSearchEvaluator)
+
+
+def nextGeneration(jobs, evaluator, population, select, recombine, mutate, populationSize):
+    """
+    Compute the next generation of population, a list of (cost, schedule).
+    The population is evaluated with evaluator (see Evaluator.evaluateBatch).
+    """
+    # (1) selection
+    fittest = select(jobs, population)
+
+    # (2) recombination
+    next_generation = []
+    while len(fittest) + len(next_generation) < populationSize:
+        next_generation.append(
+            recombine(jobs, random.choice(fittest)[1], random.choice(fittest)[1]))
+
+    # dummy value for cost
+    population = fittest + [(0, s) for s in next_generation]
+
+    # old idea
+    # random.shuffle(fittest)
+    # for (_, i1), (_, i2) in zip(*[iter(goodPopulation)]*2):
+    #     # TODO randomize which parts are taken from which individual
+    #     pass
+
+    # (3) mutation
+    for _, individual in population:
+        mutate(jobs, individual)
+
+    # reevaluate population
+    schedules = [i for _, i in population]
+    return list(zip(evaluator.evaluateBatch(schedules), schedules))
+
+
 # TODO do we need to parameterize select? (probably yes)
 def geneticSearchTemplate(jobs, recombine, mutate=mutate_none, select=select_best,
-        populationSize=100, maxTime=None):
+        populationSize=100, maxTime=None, callback=None, cache=None, decoder="semiactive",
+        initial=None, checkpoint=None, resume=None, gap=0):
     """
     Genetic algorithm for the jobshop scheduling problem.
+    Set cache to the number of makespans of recently evaluated
+    schedules to remember (see CachedEvaluator).
+    Set decoder to "active" to evaluate active schedules or to "partial"
+    to evaluate partial schedules (see evaluator.py).
+    The initial schedules (see initialSchedules, with "dispatch" half
+    of the population) are completed with random schedules.
     """
+    _checkDecoder(recombine, decoder)
 
     numGenerations = 10   # generations calculated between logging
     solutions = []   # list of (time, schedule) with decreasing time
-    best = 10000000  # TODO set initial value for max of add check in loop
 
     t0 = time.time()
     totalGenerations = 0
+    callback = callback or PrintSink()
 
     j = len(jobs)
     m = len(jobs[0])
     l = j*m
 
-    # initial generation
-    schedules = [randomSchedule(j, m) for i in range(populationSize)]
-    fitness = [cost(jobs, s) for s in schedules]
-
-    # TODO rethink datastructure for population
-    #   - using (cost, permutation) let us easily sort by cost
-    #   - but cost changes in every step and we jsut need to recalculate at the end
-    population = list(zip(fitness, schedules))
+    # the population is evaluated at once with numpy
+    evaluator = makeEvaluator(jobs, decoder, cache)
+    bound = lowerBound(jobs)
+    target = targetMakespan(bound, gap)
+
+    if resume:
+        # continue with the population, counters and state of random of the checkpoint
+        best = resume.meta["best"]
+        solutions.append((best, resume.arrays["best"].tolist()))
+        population = list(zip(resume.arrays["costs"].tolist(), resume.arrays["population"].tolist()))
+        totalGenerations = resume.meta["generations"]
+        numGenerations = resume.meta["numGenerations"]
+        evaluator.evaluations = resume.meta["evaluations"]
+        t0 -= resume.meta["time"]
+        random.setstate(resume.randomState)
+    else:
+        # initial generation
+        schedules = initialSchedules(initial, jobs, populationSize // 2)[:populationSize]
+        schedules += [randomSchedule(j, m) for i in range(populationSize - len(schedules))]
+        fitness = evaluator.evaluateBatch(schedules)
+
+        # TODO rethink datastructure for population
+        #   - using (cost, permutation) let us easily sort by cost
+        #   - but cost changes in every step and we jsut need to recalculate at the end
+        population = list(zip(fitness, schedules))
+
+        # the best initial individual, so an interrupted first generation has a result
+        best, schedule = min(population)
+        solutions.append((best, evaluator.decode(schedule)))
+        callback(event("improvement", "geneticSearchTemplate", t0,
+                evaluator.evaluations, best, solutions[-1][1]))
 
     while True:
         try:
             start = time.time()
+            if best <= target:
+                raise OutOfTime("Lower bound reached")
 
             for g in range(numGenerations):
-                # (1) selection
-                fittest = select(jobs, population)
-
-                # (2) recombination
-                next_generation = []
-                while len(fittest) + len(next_generation) < populationSize:
-                    next_generation.append(
-                        recombine(jobs, random.choice(fittest)[1], random.choice(fittest)[1]))
-
-                # dummy value for cost
-                population = fittest + [(0, s) for s in next_generation]
-
-                # old idea
-                # random.shuffle(fittest)
-                # for (_, i1), (_, i2) in zip(*[iter(goodPopulation)]*2):
-                #     # TODO randomize which parts are taken from which individual
-                #     pass
-
-                # (3) mutation
-                for _, individual in population:
-                    mutate(jobs, individual)
-
-                # reevaluate population
-                population = [(cost(jobs, i), i) for _, i in population]
+                population = nextGeneration(jobs, evaluator, population,
+                        select, recombine, mutate, populationSize)
 
                 best_individuum = min(population)
 
                 if best_individuum[0] < best:
                     best = best_individuum[0]
-                    solutions.append(best_individuum)
+                    # copy since individuals are mutated in place
+                    solutions.append((best, evaluator.decode(best_individuum[1])))
+                    callback(event("improvement", "geneticSearchTemplate", t0,
+                            evaluator.evaluations, best, solutions[-1][1]))
+                    if best <= target:
+                        raise OutOfTime("Lower bound reached")
 
                 totalGenerations += 1
 
             # print("Generation", totalGenerations)
 
-            if maxTime and time.time() - t0 >= maxTime:
-                raise OutOfTime("Time is over")
-
             t = time.time() - start
-            if t > 0:
-                print("Best:", best, "({:.1f} Generations/s, {:.1f} s)".format(
-                        numGenerations/t, time.time() - t0))
 
             # Make outputs appear about every 3 seconds.
             if t > 4:
@@ -166,12 +369,181 @@ def geneticSearchTemplate(jobs, recombine, mutate=mutate_none, select=select_bes
             elif t < 1.5:
                 numGenerations *= 2
 
+            if checkpoint:
+                saveCheckpoint(checkpoint, "geneticSearchTemplate",
+                        dict(best=best, generations=totalGenerations, numGenerations=numGenerations,
+                             evaluations=evaluator.evaluations, time=time.time() - t0),
+                        best=solutions[-1][1],
+                        costs=[c for c, _ in population],
+                        population=[s for _, s in population])
+
+            if maxTime and time.time() - t0 >= maxTime:
+                raise OutOfTime("Time is over")
+
+            callback(event("batch", "geneticSearchTemplate", t0,
+                    evaluator.evaluations, best, solutions[-1][1]))
+
         except (KeyboardInterrupt, OutOfTime) as e:
+            callback(event("end", "geneticSearchTemplate", t0,
+                    evaluator.evaluations, best, solutions[-1][1]))
+
             print()
             print("================================================")
-            print("Best time:", best, "  (lower bound {})".format(lowerBound(jobs)))
+            print("Best time:", best, "  (lower bound {})".format(bound))
             print("Best solution:")
             print(solutions[-1][1])
             print("Found in {:} generations in {:.1f}s".format(totalGenerations, time.time() - t0))
+            if cache:
+                print("Cache hit rate: {:.1%}".format(evaluator.hitRate))
 
             return solutions[-1]
+
+
+# State of an island worker process, set once by _initIsland.
+_island = None
+
+
+def _initIsland(jobs, params, inboxes, stop, progress):
+    global _island
+    decoder, cache = params[8:10]
+    _island = (jobs, makeEvaluator(jobs, decoder, cache), params, inboxes, stop, progress)
+
+
+def _runIsland(index, seed):
+    """
+    Evolve the population of island index until the time is over or
+    an island reached the target makespan (it sets stop).
+    Every migrationInterval generations the best individuals are sent
+    to the next island in the ring as int32 arrays and the progress
+    (index, evaluations, best, schedule or None) is reported.
+    Returns (cost, schedule, generations, evaluations) of the best individual.
+    """
+    jobs, evaluator, params, inboxes, stop, progress = _island
+    (select, recombine, mutate, populationSize, deadline, migrationInterval, migrants, target,
+            decoder, cache, initial) = params
+
+    random.seed(seed)
+    totalGenerations = 0
+
+    j = len(jobs)
+    m = len(jobs[0])
+    schedules = [s[:] for s in initial[:populationSize]]
+    schedules += [randomSchedule(j, m) for i in range(populationSize - len(schedules))]
+    population = list(zip(evaluator.evaluateBatch(schedules), schedules))
+    best = min(population)
+    best = (best[0], evaluator.decode(best[1]))
+    progress.put((index, evaluator.evaluations, best[0], np.array(best[1], dtype=np.int32)))
+
+    try:
+        while not (stop.is_set() or deadline and time.time() >= deadline):
+            for g in range(migrationInterval):
+                population = nextGeneration(jobs, evaluator, population,
+                        select, recombine, mutate, populationSize)
+                totalGenerations += 1
+
+            population.sort()
+            if population[0][0] < best[0]:
+                best = (population[0][0], evaluator.decode(population[0][1]))
+                progress.put((index, evaluator.evaluations, best[0], np.array(best[1], dtype=np.int32)))
+                if best[0] <= target:
+                    stop.set()
+            else:
+                progress.put((index, evaluator.evaluations, None, None))
+
+            # send the best individuals to the next island
+            outbox = inboxes[(index + 1) % len(inboxes)]
+            outbox.put(np.array([s for _, s in population[:migrants]], dtype=np.int32))
+
+            # replace the worst individuals by the immigrants of all queued
+            # batches at once, the best individuals are always kept
+            immigrants = []
+            try:
+                while True:
+                    immigrants.extend(inboxes[index].get_nowait().tolist())
+            except queue.Empty:
+                pass
+            immigrants = immigrants[:populationSize - migrants]
+            if immigrants:
+                costs = evaluator.evaluateBatch(immigrants)
+                population[-len(immigrants):] = zip(costs, immigrants)
+    except KeyboardInterrupt:
+        pass
+
+    return best[0], np.array(best[1], dtype=np.int32), totalGenerations, evaluator.evaluations
+
+
+def geneticSearchIslands(jobs, recombine, mutate=mutate_none, select=select_best,
+        populationSize=100, maxTime=None, islands=None, migrationInterval=10, migrants=2,
+        decoder="semiactive", gap=0, callback=None, cache=None, initial=None):
+    """
+    Island model of geneticSearchTemplate.
+
+    Runs islands (default: number of cpus) independent populations in
+    a process pool, one island per worker. Every migrationInterval
+    generations each island sends its migrants best individuals to its
+    neighbor in a ring. select, recombine and mutate must be picklable
+    (module level functions or partials of them).
+    The events report the best individual of all islands and the
+    evaluations summed over the islands. All islands stop as soon as
+    one of them reaches the target makespan.
+    cache, decoder and initial are used by every island like in
+    geneticSearchTemplate, islands can not be checkpointed.
+    """
+    _checkDecoder(recombine, decoder)
+    if not islands:
+        islands = multiprocessing.cpu_count()
+
+    t0 = time.time()
+    bound = lowerBound(jobs)
+
+    # the islands stop at the deadline, so the lower bound and
+    # the start of the workers count against maxTime
+    params = (select, recombine, mutate, populationSize, maxTime and t0 + maxTime, migrationInterval, migrants,
+            targetMakespan(bound, gap), decoder, cache, initialSchedules(initial, jobs, populationSize // 2))
+    inboxes = [multiprocessing.Queue() for _ in range(islands)]
+    stop = multiprocessing.Event()
+    progress = multiprocessing.Queue()
+    seeds = [random.randrange(2**32) for _ in range(islands)]
+
+    callback = callback or PrintSink()
+    evaluations = [0]*islands   # evaluations of each island so far
+    best = None
+    lastBatch = t0
+
+    with multiprocessing.Pool(islands, _initIsland, (jobs, params, inboxes, stop, progress)) as pool:
+        results = pool.starmap_async(_runIsland, enumerate(seeds), chunksize=1)
+        try:
+            while not results.ready():
+                try:
+                    index, evaluations[index], c, s = progress.get(timeout=0.1)
+                    if c is not None and (best is None or c < best):
+                        best = c
+                        schedule = s.tolist()
+                        callback(event("improvement", "geneticSearchIslands", t0,
+                                sum(evaluations), best, schedule))
+                except queue.Empty:
+                    pass
+
+                # Make outputs appear about every 3 seconds.
+                if best is not None and time.time() - lastBatch >= 3:
+                    lastBatch = time.time()
+                    callback(event("batch", "geneticSearchIslands", t0, sum(evaluations), best, schedule))
+        except KeyboardInterrupt:
+            # the workers stop on the interrupt as well
+            stop.set()
+        results = results.get()
+
+    best, schedule, _, _ = min(results, key=lambda r: r[0])
+    schedule = schedule.tolist()
+    totalGenerations = sum(r[2] for r in results)
+    callback(event("end", "geneticSearchIslands", t0, sum(r[3] for r in results), best, schedule))
+
+    print()
+    print("================================================")
+    print("Best time:", best, "  (lower bound {})".format(bound))
+    print("Best solution:")
+    print(schedule)
+    print("Found in {:} generations on {} islands in {:.1f}s".format(
+            totalGenerations, islands, time.time() - t0))
+
+    return best, schedule
@@ -0,0 +1,286 @@
+from .jobshop import *
+
+"""
+Disjunctive graph representation
+================================
+
+A schedule can also be represented by the order of tasks on each
+machine. Together with the fixed order of tasks within each job
+this defines a directed acyclic graph (the selected disjunctive
+graph) whose nodes are the operations. An operation o = job*m + task
+has the job predecessor o - 1 (if task > 0) and the machine predecessor
+given by the order of tasks on its machine.
+
+The *head* r[o] of an operation is the length of the longest path from
+the start to o (its earliest start time) and its *tail* q[o] is the
+length of the longest path from the end of o to the end of the schedule.
+The makespan is max(r[o] + p[o] + q[o]) and an operation is *critical*
+if r[o] + p[o] + q[o] equals the makespan.
+
+The makespan can only be improved by changing the order of operations
+on a critical path. A critical path decomposes into *blocks* of
+consecutive operations on the same machine. Swapping operations inside
+a block which are not at its borders can not shorten the critical
+path (N5, Nowicki and Smutnicki 1996). N6 (Balas and Vazacopoulos 1998)
+additionally moves operations to the start or end of their block if
+this is guaranteed to keep the graph acyclic.
+
+A move only reorders the operations of a machine between two
+positions. Their new heads and tails are estimated from the heads and
+tails of their (unchanged) job neighbors and of the machine neighbors
+outside the reordered segment, which gives an estimate of the makespan
+in O(k) for k reordered operations instead of O(n) (Taillard 1994,
+Balas and Vazacopoulos 1998). For swaps of two adjacent operations
+(N5) it is a lower bound of the new makespan.
+
+Every permutation schedule defines a graph (the machine order is the
+order in which cost() schedules the tasks) and both have the same
+makespan. A graph is converted back to a permutation by listing the
+operations in topological order.
+"""
+
+
+class DisjunctiveGraph:
+    """
+    Schedule represented by the order of operations on each machine.
+
+    sequences[machine] is the list of operations (job*m + task)
+    processed on machine in this order.
+    A move (machine, i, k) moves the operation at position i of
+    sequences[machine] to position k.
+    """
+
+    def __init__(self, jobs, sequences):
+        self.jobs = jobs
+        self.j = len(jobs)
+        self.m = len(jobs[0])
+
+        self.machine = [machine for job in jobs for machine, _ in job]
+        self.p = [time for job in jobs for _, time in job]
+
+        self.sequences = [list(sequence) for sequence in sequences]
+        self.evaluate()
+
+    @classmethod
+    def fromSchedule(cls, jobs, schedule):
+        """Build the graph of a (permutation) schedule."""
+        m = len(jobs[0])
+        ij = [0]*len(jobs)
+        sequences = [[] for _ in range(m)]
+
+        for i in schedule:
+            machine, _ = jobs[i][ij[i]]
+            sequences[machine].append(i*m + ij[i])
+            ij[i] += 1
+
+        return cls(jobs, sequences)
+
+    def toSchedule(self):
+        """Return a permutation schedule with the same timetable."""
+        return [o // self.m for o in self.order]
+
+    def copy(self):
+        return DisjunctiveGraph(self.jobs, self.sequences)
+
+    def _heads(self):
+        """
+        Return (order, r, mp, ms): a topological order, the heads and the
+        machine predecessor and successor (-1 if none) of each operation.
+        Raises ValueError if the machine orders contain a cycle.
+        """
+        m = self.m
+        p = self.p
+        n = self.j * m
+
+        mp = [-1]*n
+        ms = [-1]*n
+        for sequence in self.sequences:
+            for a, b in zip(sequence, sequence[1:]):
+                mp[b] = a
+                ms[a] = b
+
+        # Kahn's algorithm, an operation has at most two predecessors
+        indegree = [(o % m > 0) + (mp[o] >= 0) for o in range(n)]
+        ready = [o for o in range(n) if indegree[o] == 0]
+        order = []
+        r = [0]*n
+
+        while ready:
+            o = ready.pop()
+            order.append(o)
+            end = r[o] + p[o]
+            for s in (o + 1 if (o + 1) % m else -1, ms[o]):
+                if s >= 0:
+                    if end > r[s]:
+                        r[s] = end
+                    indegree[s] -= 1
+                    if indegree[s] == 0:
+                        ready.append(s)
+
+        if len(order) < n:
+            raise ValueError("The machine orders contain a cycle.")
+
+        return order, r, mp, ms
+
+    def evaluate(self):
+        """
+        Compute heads, tails, a topological order and the makespan.
+        Raises ValueError if the machine orders contain a cycle.
+        """
+        m = self.m
+        p = self.p
+
+        order, r, mp, ms = self._heads()
+
+        q = [0]*len(r)
+        for o in reversed(order):
+            for s in (o + 1 if (o + 1) % m else -1, ms[o]):
+                if s >= 0:
+                    q[o] = max(q[o], q[s] + p[s])
+
+        self.order = order
+        self.r = r
+        self.q = q
+        self.mp = mp
+        self.ms = ms
+        self.makespan = max(r[o] + p[o] for o in order)
+
+        return self.makespan
+
+    def criticalPath(self):
+        """Return the operations of a critical path from start to end."""
+        m = self.m
+        r, p, q = self.r, self.p, self.q
+
+        o = max(range(len(r)), key=lambda o: (r[o] + p[o] == self.makespan, -r[o]))
+        path = [o]
+        while r[o] > 0:
+            jp = o - 1 if o % m else -1
+            if jp >= 0 and r[jp] + p[jp] == r[o]:
+                o = jp
+            else:
+                o = self.mp[o]
+            path.append(o)
+
+        path.reverse()
+        return path
+
+    def criticalBlocks(self):
+        """Split the critical path into blocks of operations on the same machine."""
+        blocks = []
+        for o in self.criticalPath():
+            if blocks and self.machine[blocks[-1][-1]] == self.machine[o]:
+                blocks[-1].append(o)
+            else:
+                blocks.append([o])
+        return blocks
+
+    def neighbors(self, kind="N5"):
+        """
+        Return the moves (machine, i, k) of the N5 or N6 neighborhood.
+        All moves result in acyclic graphs.
+        """
+        m = self.m
+        r, p, q = self.r, self.p, self.q
+        position = self.position()
+
+        blocks = self.criticalBlocks()
+        moves = []
+
+        for b, block in enumerate(blocks):
+            if len(block) < 2:
+                continue
+            machine = self.machine[block[0]]
+            first = position[block[0]]
+            last = position[block[-1]]
+
+            if kind == "N5":
+                # swap the first two (not in the first block) and
+                # the last two (not in the last block) operations
+                if b > 0:
+                    moves.append((machine, first + 1, first))
+                if b < len(blocks) - 1 and (b == 0 or len(block) > 2):
+                    moves.append((machine, last - 1, last))
+            elif kind == "N6":
+                for u in block[1:]:
+                    # move u right before the first operation
+                    jp = u - 1 if u % m else -1
+                    if jp < 0 or r[block[0]] + p[block[0]] >= r[jp] + p[jp]:
+                        moves.append((machine, position[u], first))
+                for u in block[:-1]:
+                    # move u right after the last operation
+                    js = u + 1 if (u + 1) % m else -1
+                    move = (machine, position[u], last)
+                    if (js < 0 or q[block[-1]] + p[block[-1]] >= q[js] + p[js]) and move not in moves:
+                        moves.append(move)
+            else:
+                raise ValueError("Unknown neighborhood {}".format(kind))
+
+        return moves
+
+    def position(self):
+        """Return the position of each operation in its machine sequence."""
+        position = [0]*len(self.p)
+        for sequence in self.sequences:
+            for i, o in enumerate(sequence):
+                position[o] = i
+        return position
+
+    def moveEstimate(self, move):
+        """Estimate the makespan after move from the heads and tails (see above)."""
+        machine, i, k = move
+        m = self.m
+        r, p, q = self.r, self.p, self.q
+        sequence = self.sequences[machine]
+
+        # the operations between i and k in their new order
+        a, b = min(i, k), max(i, k)
+        segment = sequence[a:b+1]
+        if i < k:
+            segment.append(segment.pop(0))
+        else:
+            segment.insert(0, segment.pop())
+
+        heads = []
+        end = r[sequence[a-1]] + p[sequence[a-1]] if a > 0 else 0
+        for o in segment:
+            head = end
+            if o % m and r[o-1] + p[o-1] > head:
+                head = r[o-1] + p[o-1]
+            heads.append(head)
+            end = head + p[o]
+
+        estimate = 0
+        start = q[sequence[b+1]] + p[sequence[b+1]] if b + 1 < len(sequence) else 0
+        for o, head in zip(reversed(segment), reversed(heads)):
+            tail = start
+            if (o + 1) % m and q[o+1] + p[o+1] > tail:
+                tail = q[o+1] + p[o+1]
+            estimate = max(estimate, head + p[o] + tail)
+            start = tail + p[o]
+
+        return estimate
+
+    def moveCost(self, move):
+        """Return the exact makespan after move without changing the graph (O(n))."""
+        machine, i, k = move
+        sequence = self.sequences[machine]
+        sequence.insert(k, sequence.pop(i))
+        try:
+            _, r, _, _ = self._heads()
+        finally:
+            sequence.insert(i, sequence.pop(k))
+        p = self.p
+        return max(r[o] + p[o] for o in range(len(r)))
+
+    def applyMove(self, move):
+        """Apply a move in place and return the new makespan."""
+        machine, i, k = move
+        sequence = self.sequences[machine]
+        sequence.insert(k, sequence.pop(i))
+        return self.evaluate()
+
+    def revertMove(self, move):
+        """Undo applyMove(move)."""
+        machine, i, k = move
+        return self.applyMove((machine, k, i))
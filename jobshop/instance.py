@@ -0,0 +1,153 @@
+import os
+
+import numpy as np
+
+"""
+Compiled problem instances
+==========================
+
+`readJobs` returns an instance as a list of lists of (machine, time)
+tuples which is convenient but slow to index. An `Instance` stores
+the same data as two contiguous int32 arrays of shape (j, m):
+
+    machine[job, task]   machine required by task of job
+    duration[job, task]  processing time of task of job
+
+This allows to evaluate many schedules at once with numpy
+(see `cost_batch`).
+
+Loading large instances
+-----------------------
+
+`loadInstance` parses the text format of `readJobs` in bulk
+straight into integer arrays. It stores the parsed arrays in a
+binary sidecar file `.<name>.npy` next to the instance which is
+memory-mapped on the next load (as long as it is newer than the
+instance file).
+
+This only saves the parsing when many instances are loaded (e.g. in
+batch runs). The searches work on the list representation, so the
+callers still convert the Instance with toJobs().
+"""
+
+
+class Instance:
+    """A problem instance compiled to numpy arrays."""
+
+    def __init__(self, machine, duration):
+        self.machine = np.ascontiguousarray(machine, dtype=np.int32)
+        self.duration = np.ascontiguousarray(duration, dtype=np.int32)
+        assert self.machine.shape == self.duration.shape
+        self.numJobs, self.numMachines = self.machine.shape
+
+    @classmethod
+    def fromJobs(cls, jobs):
+        """Compile a problem instance as returned by readJobs."""
+        machine = [[machine for machine, _ in job] for job in jobs]
+        duration = [[time for _, time in job] for job in jobs]
+        return cls(machine, duration)
+
+    def toJobs(self):
+        """Convert back to the list of (machine, time) tuples representation."""
+        return [list(zip(machine, duration))
+                for machine, duration in zip(self.machine.tolist(), self.duration.tolist())]
+
+    def __len__(self):
+        return self.numJobs
+
+    def __repr__(self):
+        return "Instance({} jobs, {} machines)".format(self.numJobs, self.numMachines)
+
+
+def compileInstance(jobs):
+    """Return jobs as an Instance (instances are returned unchanged)."""
+    if isinstance(jobs, Instance):
+        return jobs
+    return Instance.fromJobs(jobs)
+
+
+def cost_batch(instance, schedules):
+    """
+    Calculate the makespans of many schedules at once.
+
+    schedules is a (P, j*m) array (or a list of P schedules).
+    All P schedules are processed in lockstep, one position at a time,
+    exactly as in cost(). Returns an int array of P makespans.
+    """
+    instance = compileInstance(instance)
+    schedules = np.asarray(schedules, dtype=np.intp)
+    if schedules.ndim == 1:
+        schedules = schedules[np.newaxis, :]
+
+    P, l = schedules.shape
+    j, m = instance.numJobs, instance.numMachines
+
+    # flatten (row, job) and (row, machine) so that a single fancy index
+    # addresses the state of all P schedules
+    rowJobs = np.arange(P, dtype=np.intp) * j
+    rowMachines = np.arange(P, dtype=np.intp) * m
+    machine = instance.machine.ravel().astype(np.intp)
+    duration = instance.duration.ravel().astype(np.int64)
+
+    tj = np.zeros(P * j, dtype=np.int64)   # end of previous task for each job
+    tm = np.zeros(P * m, dtype=np.int64)   # end of previous task on each machine
+    ij = np.zeros(P * j, dtype=np.intp)    # task to schedule next for each job
+
+    for k in range(l):
+        job = schedules[:, k]
+        jobIndex = rowJobs + job
+        task = job * m + ij[jobIndex]
+        machineIndex = rowMachines + machine[task]
+
+        end = np.maximum(tj[jobIndex], tm[machineIndex]) + duration[task]
+        tj[jobIndex] = end
+        tm[machineIndex] = end
+        ij[jobIndex] += 1
+
+    return tm.reshape(P, m).max(axis=1)
+
+
+def parseInstance(text):
+    """Parse an instance in the text format of readJobs into an Instance."""
+    values = np.array(text.split(), dtype=np.int32)
+    j, m = values[:2]
+    tasks = values[2:].reshape(j, m, 2)
+    return Instance(tasks[:, :, 0], tasks[:, :, 1])
+
+
+def sidecarPath(path):
+    """Path of the binary sidecar file, hidden so that globs skip it."""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, "." + name + ".npy")
+
+
+def loadInstance(path, sidecar=True):
+    """
+    Load the instance at path as an Instance.
+    If sidecar is set, the binary sidecar file is used (and
+    created if missing or outdated).
+    """
+    cached = sidecarPath(path)
+
+    if sidecar:
+        try:
+            if os.path.getmtime(cached) >= os.path.getmtime(path):
+                # shape (2, j, m) so that both arrays are contiguous views
+                data = np.load(cached, mmap_mode='r')
+                return Instance(data[0], data[1])
+        except (OSError, ValueError):
+            pass
+
+    with open(path) as f:
+        instance = parseInstance(f.read())
+
+    if sidecar:
+        try:
+            tmp = cached + ".tmp{}".format(os.getpid())
+            with open(tmp, "wb") as f:
+                np.save(f, np.stack([instance.machine, instance.duration]))
+            os.replace(tmp, cached)
+        except OSError:
+            pass
+
+    return instance
@@ -1,7 +1,11 @@
 import fileinput
+import heapq
+import numbers
 import random
 import time
 
+from .bounds import lowerBound, targetMakespan
+
 """
 Job Shop Scheduling
 ===================
@@ -93,11 +97,9 @@ fast as possible.
 
 # TODO IMPORTANT: find a problem instance which is larger than
 #                 the vorlesungsbeispiel, but small enough to be examined manually
-# TODO write a (one step) local search to explore
-#       the immediate neighborhood of a schedule:
-#       find better/best neighbor by swappint two instructions (O(n^2)...)
-#       maybe there is a way to discover good/incluencial swaps, e.g. by (partially)
-#       creating the real machine schedule and swap two jobs on the same machine
+# TODO local search (see localSearch.py): maybe there is a way to discover
+#       good/incluencial swaps, e.g. by (partially) creating the real machine
+#       schedule and swap two jobs on the same machine
 # TODO write a class which provides a framework for search algorithms
 #       (see similarities of randomSearch and geneticSearch)
 # TODO consider other representations
@@ -161,21 +163,92 @@ def cost(jobs, schedule):
     return max(tm)
 
 
-def costPartial(jobs, partialSchedule):
+def completion(jobs, ij, rule="block", tj=None, tm=None):
+    """
+    Generate the jobs of the remaining tasks to complete a partial
+    schedule after ij[job] tasks of each job are scheduled,
+    using a priority rule:
+      - "block": all remaining tasks of each job in order of the jobs
+                 (the default)
+      - "mwr": the job with the most work remaining first
+      - "est": the job whose next task can start earliest first,
+               tj and tm (end of previous task for each job/machine)
+               must be kept up to date by the caller
+    Ties are broken by the job number.
+    """
+    m = len(jobs[0])
+    ij = ij[:]
+
+    if rule == "block":
+        for i, count in enumerate(ij):
+            for _ in range(m - count):
+                yield i
+
+    elif rule == "mwr":
+        heap = [(-sum(time for _, time in jobs[i][ij[i]:]), i) for i in range(len(jobs)) if ij[i] < m]
+        heapq.heapify(heap)
+        while heap:
+            work, i = heapq.heappop(heap)
+            yield i
+            _, time = jobs[i][ij[i]]
+            ij[i] += 1
+            if ij[i] < m:
+                heapq.heappush(heap, (work + time, i))
+
+    elif rule == "est":
+        unfinished = [i for i in range(len(jobs)) if ij[i] < m]
+        while unfinished:
+            i = min(unfinished, key=lambda i: (max(tj[i], tm[jobs[i][ij[i]][0]]), i))
+            yield i
+            ij[i] += 1
+            if ij[i] == m:
+                unfinished.remove(i)
+
+    else:
+        raise ValueError("Unknown completion rule {}".format(rule))
+
+
+def costPartial(jobs, partialSchedule, rule="block", normalizedSchedule=None):
     """
     Calculate the makespan of a partial schedule.
+    (1) Instructions for already finished jobs are ignored.
+    (2) Unfinished jobs are completed deterministically with
+        the priority rule (see completion()).
+    This is done in a single pass without computing the normalized
+    schedule. Pass a list as normalizedSchedule to collect it anyway.
     """
-    # (1) Ignore instructions for already finished jobs.
-    # (2) Deterministically complete unfinished jobs after
+    j = len(jobs)
+    m = len(jobs[0])
+
+    tj = [0]*j   # end of previous task for each job
+    tm = [0]*m   # end of previous task on each machine
+
+    ij = [0]*j   # task to schedule next for each job
+
+    def schedule(i):
+        machine, time = jobs[i][ij[i]]
+        ij[i] += 1
+        end = max(tj[i], tm[machine]) + time
+        tj[i] = end
+        tm[machine] = end
+        if normalizedSchedule is not None:
+            normalizedSchedule.append(i)
 
-    # TODO this can be done more efficiently
-    return cost(jobs, normalizeSchedule(partialSchedule))
+    for i in partialSchedule:
+        if ij[i] < m:
+            schedule(i)
 
+    for i in completion(jobs, ij, rule, tj, tm):
+        schedule(i)
+
+    return max(tm)
 
 
-def normalizeSchedule(jobs, partialSchedule):
+
+def normalizeSchedule(jobs, partialSchedule, rule="block"):
     """
     Extend a partial schedule to a valid schedule.
+    Unfinished jobs are completed in the same way as in costPartial.
     """
     # Process Schedule as in cost function with.
 
@@ -184,6 +257,12 @@ def normalizeSchedule(jobs, partialSchedule):
     # longer than j*m, so static arrays are problematic.
     # Maybe use 2 arrays and read one and write to the other.
 
+    if rule == "est":
+        # the rule depends on the timetable
+        normalizedSchedule = []
+        costPartial(jobs, partialSchedule, rule, normalizedSchedule)
+        return normalizedSchedule
+
     j = len(jobs)
     m = len(jobs[0])
 
@@ -198,11 +277,7 @@ def normalizeSchedule(jobs, partialSchedule):
             # ignore job for now
             pass
 
-    # TODO finish schedule greedy for better performance
-    # this has to be done in the same way as in costPartial
-    for t, count in enumerate(occurences):
-        if count < m:
-            normalizedSchedule.extend([t] * (m - count))
+    normalizedSchedule.extend(completion(jobs, occurences, rule))
 
     return normalizedSchedule
 
@@ -220,6 +295,17 @@ def randomSchedule(j, m):
     return schedule
 
 
+def checkSchedule(j, m, schedule):
+    """Raise a ValueError unless schedule is a permutation of 0^m 1^m ... (j-1)^m."""
+    counts = [0]*j
+    for i in schedule:
+        if isinstance(i, bool) or not isinstance(i, numbers.Integral) or not 0 <= i < j:
+            raise ValueError("Invalid job {!r} in schedule".format(i))
+        counts[i] += 1
+    if counts != [m]*j:
+        raise ValueError("Schedule must contain each of the {} jobs {} times".format(j, m))
+
+
 def printSchedule(jobs, schedule):
     # TODO code duplication with cost()
     j = len(jobs)
@@ -289,26 +375,6 @@ def prettyPrintSchedule(jobs, schedule):
     print("Total Time: ", max(tm))
 
 
-def lowerBound(jobs):
-    """Returns a lower bound for the problem instance jobs."""
-    def lower0():
-        # max min time of jobs
-        # each job has to be executed sequentially
-        return max(sum(time for _, time in job) for job in jobs)
-    def lower1():
-        # max min time of machines
-        # a machine must process all its tasks
-        mtimes = [0]*numMachines(jobs)
-
-        for job in jobs:
-            for machine, time in job:
-                mtimes[machine] += time
-
-        return max(mtimes)
-
-    return max(lower0(), lower1())
-
-
 def numMachines(jobs):
     return len(jobs[0])
 
@@ -0,0 +1,125 @@
+from .jobshop import *
+from .evaluator import DeltaEvaluator
+from .simulatedAnnealing import swap, insert, reverse
+
+import random
+
+"""
+Local search
+============
+
+Descent in the neighbourhoods of a schedule (permutation):
+
+    swap       swap the instructions at a and b
+    insertion  move the instruction at a to b
+    reversal   reverse the block of instructions between a and b
+
+A neighbourhood has O(n^2) moves for n = j*m. Every move is scored
+with a DeltaEvaluator which replays the schedule from the first
+changed position with the cost of the current schedule (or of the
+best neighbor so far) as bound, so the replay of most moves stops
+early as soon as they can not improve (see DeltaEvaluator.score).
+
+With strategy "first" the first improving move is applied, with
+"best" the best move of the whole neighbourhood. Moves are tried in
+random order unless randomOrder is False. maxDistance limits the
+distance between a and b.
+
+localSearch performs a variable neighbourhood descent: when the
+schedule is a local optimum of a neighbourhood the next one is
+searched, after an improvement the search starts again with the
+first neighbourhood.
+"""
+
+operators = {
+    "swap": swap,
+    "insertion": insert,
+    "reversal": reverse,
+}
+
+
+def moves(l, kind, randomOrder=True, maxDistance=None):
+    """Generate the moves (a, b) of the neighbourhood kind of a schedule of length l."""
+    positions = list(range(l))
+    if randomOrder:
+        random.shuffle(positions)
+
+    for a in positions:
+        # swap and reversal are symmetric in a and b
+        low = 0 if kind == "insertion" else a + 1
+        high = l
+        if maxDistance:
+            low = max(low, a - maxDistance)
+            high = min(high, a + maxDistance + 1)
+
+        others = list(range(low, high))
+        if randomOrder:
+            random.shuffle(others)
+
+        for b in others:
+            if b != a:
+                yield a, b
+
+
+def improve(evaluator, kind="swap", strategy="first", randomOrder=True, maxDistance=None):
+    """
+    Apply an improving move of the neighbourhood kind to the current
+    schedule of evaluator (a DeltaEvaluator).
+    Returns False if the schedule is a local optimum.
+    """
+    state = evaluator.schedule
+    move = operators[kind]
+    bound = evaluator.cost
+    bestMove = None
+
+    for a, b in moves(len(state), kind, randomOrder, maxDistance):
+        first = move(state, a, b)
+        if first is None:
+            continue
+
+        c = evaluator.score(state, first, bound)
+        if c < bound:
+            if strategy == "first":
+                evaluator.accept(state, first)
+                return True
+            bestMove = (a, b, first)
+            bound = c
+
+        move(state, b, a)
+
+    if bestMove:
+        a, b, first = bestMove
+        move(state, a, b)
+        evaluator.accept(state, first)
+        return True
+
+    return False
+
+
+def localSearch(jobs, schedule, neighbourhoods=("swap", "insertion", "reversal"), strategy="first",
+        randomOrder=True, maxDistance=None, maxSteps=None, evaluator=None):
+    """
+    Improve schedule by a variable neighbourhood descent until it is
+    a local optimum of all neighbourhoods (a name or a list of
+    names of operators) or maxSteps moves are applied.
+    Pass a DeltaEvaluator of jobs to reuse it.
+    Returns (cost, schedule).
+    """
+    if isinstance(neighbourhoods, str):
+        neighbourhoods = [neighbourhoods]
+
+    if evaluator is None:
+        evaluator = DeltaEvaluator(jobs, schedule)
+    else:
+        evaluator.reset(schedule)
+
+    k = 0
+    steps = 0
+    while k < len(neighbourhoods) and not (maxSteps and steps >= maxSteps):
+        if improve(evaluator, neighbourhoods[k], strategy, randomOrder, maxDistance):
+            steps += 1
+            k = 0
+        else:
+            k += 1
+
+    return evaluator.cost, evaluator.schedule[:]
@@ -1,14 +1,19 @@
 from .jobshop import *
+from .evaluator import makeEvaluator
+from .dispatch import initialSchedules
+from .events import PrintSink, event
 
 import random
 import time
 
 
-def randomSearch(jobs, maxTime=None):
+def randomSearch(jobs, maxTime=None, callback=None, decoder="semiactive", initial=None, gap=0):
     """
     Perform random search for problem instance jobs.
     Set maxTime to limit the computation time or raise
     a KeyboardInterrupt (Ctrl+C) to stop.
+    Set decoder to "active" to evaluate active schedules (see evaluator.py).
+    The initial schedules (see initialSchedules) are evaluated first.
     """
 
     numExperiments = 100    # experiments performed per loop
@@ -18,32 +23,47 @@ def randomSearch(jobs, maxTime=None):
 
     t0 = time.time()
     totalExperiments = 0
+    callback = callback or PrintSink()
 
     j = len(jobs)
     m = len(jobs[0])
     rs = randomSchedule(j, m)
+    evaluator = makeEvaluator(jobs, decoder)
+    bound = lowerBound(jobs)
+    target = targetMakespan(bound, gap)
+
+    for schedule in initialSchedules(initial, jobs):
+        c = evaluator.evaluate(schedule)
+        if c < best:
+            best = c
+            solutions.append((c, evaluator.decode(schedule)))
+            callback(event("improvement", "randomSearch", t0, evaluator.evaluations, c, solutions[-1][1]))
 
     while True:
         try:
             start = time.time()
+            if best <= target:
+                raise OutOfTime("Lower bound reached")
 
             for i in range(numExperiments):
                 random.shuffle(rs)
-                c = cost(jobs, rs)
+                c = evaluator.evaluate(rs)
 
                 if c < best:
                     best = c
-                    solutions.append((c, rs))
+                    solutions.append((c, evaluator.decode(rs)))
+                    callback(event("improvement", "randomSearch", t0, evaluator.evaluations, c, solutions[-1][1]))
+                    if best <= target:
+                        raise OutOfTime("Lower bound reached")
 
             totalExperiments += numExperiments
 
             if maxTime and time.time() - t0 > maxTime:
                 raise OutOfTime("Time is over")
 
+            callback(event("batch", "randomSearch", t0, evaluator.evaluations, best, solutions[-1][1]))
+
             t = time.time() - start
-            if t > 0:
-                print("Best:", best, "({:.1f} Experiments/s, {:.1f} s)".format(
-                        numExperiments/t, time.time() - t0))
 
             # Make outputs appear about every 3 seconds.
             if t > 4:
@@ -52,9 +72,11 @@ def randomSearch(jobs, maxTime=None):
                 numExperiments *= 2
 
         except (KeyboardInterrupt, OutOfTime) as e:
+            callback(event("end", "randomSearch", t0, evaluator.evaluations, best, solutions[-1][1]))
+
             print()
             print("================================================")
-            print("Best time:", best, "  (lower bound {})".format(lowerBound(jobs)))
+            print("Best time:", best, "  (lower bound {})".format(bound))
             print("Best solution:")
             print(solutions[-1][1])
             print("Found in {:} experiments in {:.1f}s".format(totalExperiments, time.time() - t0))
@@ -0,0 +1,71 @@
+from .jobshop import *
+from .batch import algorithms
+
+import random
+
+"""
+Re-optimisation
+===============
+
+When an instance changes slightly (a job is added or removed,
+a duration or a machine changes) the previous solution is still
+a good start. `remapSchedule` turns it into a valid schedule of the
+new instance with normalizeSchedule (instructions of removed jobs
+are dropped, the tasks of new jobs are spread over it) and `reoptimize`
+warm-starts a search with it and its neighbours (see the initial
+argument of the searches).
+"""
+
+
+def remapSchedule(jobs, schedule):
+    """
+    Return schedule as a valid schedule of jobs. The tasks of jobs
+    which do not occur in schedule are spread evenly over it.
+    """
+    j = len(jobs)
+    m = len(jobs[0])
+    schedule = [i for i in schedule if i < j]
+
+    present = set(schedule)
+    missing = [i for i in range(j) if i not in present]
+    if missing:
+        # insert from the back so that the positions stay valid
+        l = len(schedule)
+        for k in reversed(range(m)):
+            position = (k * l) // m
+            schedule[position:position] = missing
+
+    return normalizeSchedule(jobs, schedule)
+
+
+def neighbours(schedule, count, maxSwaps=3):
+    """
+    Return count neighbours of schedule, each with up to maxSwaps
+    pairs of adjacent instructions swapped.
+    """
+    result = []
+    for _ in range(count):
+        s = schedule[:]
+        for _ in range(random.randint(1, maxSwaps)):
+            a = random.randrange(len(s) - 1)
+            s[a], s[a+1] = s[a+1], s[a]
+        result.append(s)
+    return result
+
+
+def warmStart(jobs, previous, numNeighbours=20):
+    """Return the remapped previous schedule and numNeighbours of its neighbours."""
+    schedule = remapSchedule(jobs, previous)
+    return [schedule] + neighbours(schedule, numNeighbours)
+
+
+def reoptimize(jobs, previous, algorithm="SA", numNeighbours=20, **kwargs):
+    """
+    Solve jobs with algorithm (a key of batch.algorithms) starting
+    from the previous schedule of a slightly different instance.
+    kwargs are passed to the search. Returns (cost, schedule).
+    DR (dispatchSearch) takes no initial schedules and can not be used.
+    """
+    if algorithm == "DR":
+        raise ValueError("DR can not start from a previous schedule")
+    return algorithms[algorithm](jobs, initial=warmStart(jobs, previous, numNeighbours), **kwargs)
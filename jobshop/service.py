@@ -0,0 +1,354 @@
+from .jobshop import *
+from .instance import loadInstance, parseInstance
+from .batch import algorithms
+from . import geneticSearch
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import _thread
+from collections import OrderedDict, deque
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import numbers
+import os
+import random
+import threading
+import time
+
+"""
+Anytime solver service
+======================
+
+A local HTTP server which solves instances in a pool of warm worker
+processes. A job is submitted with
+
+    POST /jobs      {"instance": "instances/abz5", "algorithm": "SA",
+                     "maxTime": 10, "seed": 1, "options": {...}}
+
+where instead of a path "text" can hold the instance in the format of
+readJobs and options are passed to the search (for GS the select,
+recombine and mutate options are names like "tournament" or "jox").
+An initial schedule (or list of schedules) in the options must be
+valid for the instance (see remapSchedule to adapt an old one).
+The response is {"id": ...}. Then
+
+    GET /jobs/<id>     state ("queued", "running", "done", "cancelled"
+                       or "failed"), best, schedule, time and
+                       evaluations of the best solution found so far
+    DELETE /jobs/<id>  cancel the job, the best solution so far is kept
+    GET /jobs          all jobs without their schedules
+
+A running job is cancelled like a search on Ctrl+C: a thread of the
+worker raises a KeyboardInterrupt in the search (within interval
+seconds), which then returns its best solution. Only the keep most
+recently finished jobs are remembered.
+
+The workers cache the instances most recently parsed (keyed by path
+and modification time or by the text), so re-solving an instance
+costs neither the interpreter startup nor the parsing. Each worker
+keeps at most instances of them, the least recently used are dropped.
+They do not write sidecar files (see loadInstance) since clients may
+send any path.
+"""
+
+
+# State of a worker process, set once by _initWorker.
+_worker = None
+# job solved by the worker process and the lock to change it
+_running = [None, threading.Lock()]
+
+
+def _initWorker(progress, cancelled, interval, size):
+    global _worker
+    _worker = (progress, cancelled, (OrderedDict(), size))
+    threading.Thread(target=_watch, args=(cancelled, interval), daemon=True).start()
+
+
+def _watch(cancelled, interval):
+    """Interrupt the search of the running job as soon as it is cancelled."""
+    while True:
+        time.sleep(interval)
+        with _running[1]:
+            if _running[0] is not None and _running[0] in cancelled:
+                _running[0] = None
+                _thread.interrupt_main()
+
+
+def _loadJobs(instance, text):
+    """Return the jobs of the instance at path (or in text), cached per worker."""
+    _, _, (instances, size) = _worker
+    if text is not None:
+        key = ("text", hash(text))
+    else:
+        key = (instance, os.path.getmtime(instance))
+
+    if key in instances:
+        instances.move_to_end(key)
+    else:
+        if text is not None:
+            instances[key] = parseInstance(text).toJobs()
+        else:
+            instances[key] = loadInstance(instance, sidecar=False).toJobs()
+        while len(instances) > size:
+            instances.popitem(last=False)
+    return instances[key]
+
+
+class _ProgressSink:
+    """Send the events of job to the service."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def __call__(self, event):
+        progress, _, _ = _worker
+        progress.put((self.job, event.kind, event.time, event.evaluations, event.best, list(event.schedule)))
+
+
+def _solve(job, instance, text, algorithm, maxTime, seed, options):
+    progress, cancelled, _ = _worker
+    if job in cancelled:
+        return None
+
+    progress.put((job, "start", 0, 0, None, None))
+    jobs = _loadJobs(instance, text)
+    random.seed(seed)
+
+    try:
+        with _running[1]:
+            _running[0] = job
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return algorithms[algorithm](jobs, maxTime=maxTime, callback=_ProgressSink(job), **options)
+        finally:
+            with _running[1]:
+                _running[0] = None
+    except KeyboardInterrupt:
+        # cancelled outside of the search loop,
+        # the best solution was already sent with the events
+        return None
+
+
+def _instanceSize(instance, text):
+    """Return (j, m) from the first line of the instance at path (or in text)."""
+    if text is None:
+        with open(instance) as f:
+            text = f.readline()
+    return tuple(int(n) for n in text.split()[:2])
+
+
+def searchOptions(algorithm, options):
+    """Resolve the names of the GS operators in options to functions."""
+    options = dict(options)
+    if algorithm == "GS":
+        options.setdefault("recombine", "simpleCrossover")
+        for operator in ("select", "recombine", "mutate"):
+            if operator in options:
+                options[operator] = getattr(geneticSearch, operator + "_" + options[operator])
+    return options
+
+
+class SolverService:
+    """
+    Jobs solved by a pool of workers processes (default: number of cpus).
+    The keep most recently finished jobs are remembered, cancelled
+    jobs are stopped within interval seconds. Each worker caches
+    the instances most recently used.
+    """
+
+    def __init__(self, workers=None, keep=1000, interval=0.1, instances=16):
+        self.progress = multiprocessing.Queue()
+        self.manager = multiprocessing.Manager()
+        self.cancelled = self.manager.dict()
+        self.pool = multiprocessing.Pool(workers, _initWorker, (self.progress, self.cancelled, interval, instances))
+
+        self.jobs = {}
+        self.finished = deque()   # ids of the finished jobs, oldest first
+        self.keep = keep
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+        self.listener = threading.Thread(target=self._listen, daemon=True)
+        self.listener.start()
+
+    def submit(self, instance=None, text=None, algorithm="SA", maxTime=10, seed=None, options=None):
+        """Submit a job and return its id."""
+        if algorithm not in algorithms:
+            raise ValueError("Unknown algorithm {}".format(algorithm))
+        if text is None and not os.path.isfile(str(instance)):
+            raise ValueError("No such instance {}".format(instance))
+        if isinstance(maxTime, bool) or not isinstance(maxTime, numbers.Real) or not maxTime > 0:
+            raise ValueError("maxTime must be a positive number of seconds")
+        if seed is None:
+            seed = random.randint(0, 10000)
+        elif isinstance(seed, bool) or not isinstance(seed, numbers.Integral):
+            raise ValueError("seed must be an integer")
+        kwargs = searchOptions(algorithm, options or {})
+        initial = kwargs.get("initial")
+        if algorithm == "DR" and "initial" in kwargs:
+            raise ValueError("DR takes no initial schedules")
+        if initial not in (None, "dispatch"):
+            # fail now instead of deep inside the search
+            if not isinstance(initial, list) or not initial:
+                raise ValueError('initial must be a schedule, a list of schedules or "dispatch"')
+            j, m = _instanceSize(instance, text)
+            for schedule in initial if isinstance(initial[0], list) else [initial]:
+                checkSchedule(j, m, schedule)
+
+        with self.lock:
+            job = next(self.ids)
+            self.jobs[job] = {
+                "id": job,
+                "instance": instance,
+                "algorithm": algorithm,
+                "maxTime": float(maxTime),
+                "seed": seed,
+                "state": "queued",
+                "best": None,
+                "schedule": None,
+                "time": 0,
+                "evaluations": 0,
+            }
+
+        self.pool.apply_async(_solve, (job, instance, text, algorithm, float(maxTime), seed, kwargs),
+                callback=lambda result: self._finish(job, result),
+                error_callback=lambda error: self._fail(job, error))
+        return job
+
+    def status(self, job, schedule=True):
+        """Return a copy of the state of job (None if unknown)."""
+        with self.lock:
+            if job not in self.jobs:
+                return None
+            status = dict(self.jobs[job])
+        if not schedule:
+            del status["schedule"]
+        return status
+
+    def list(self):
+        with self.lock:
+            jobs = sorted(self.jobs)
+        return [self.status(job, schedule=False) for job in jobs]
+
+    def cancel(self, job):
+        """Cancel job, returns False if it is unknown."""
+        with self.lock:
+            if job not in self.jobs:
+                return False
+            if self.jobs[job]["state"] in ("queued", "running"):
+                self.cancelled[job] = True
+                if self.jobs[job]["state"] == "queued":
+                    self.jobs[job]["state"] = "cancelled"
+        return True
+
+    def _listen(self):
+        while True:
+            job, kind, t, evaluations, best, schedule = self.progress.get()
+            with self.lock:
+                status = self.jobs.get(job)
+                if status is None:
+                    # already evicted
+                    continue
+                if kind == "start":
+                    if status["state"] == "queued":
+                        status["state"] = "running"
+                    continue
+                status["time"] = t
+                status["evaluations"] = evaluations
+                if status["best"] is None or best <= status["best"]:
+                    status["best"] = best
+                    status["schedule"] = schedule
+
+    def _finish(self, job, result):
+        with self.lock:
+            status = self.jobs[job]
+            if result is not None:
+                best, schedule = result
+                if status["best"] is None or best <= status["best"]:
+                    status["best"] = best
+                    status["schedule"] = list(schedule)
+            status["state"] = "cancelled" if job in self.cancelled else "done"
+            self._evict(job)
+
+    def _fail(self, job, error):
+        with self.lock:
+            self.jobs[job]["state"] = "failed"
+            self.jobs[job]["error"] = repr(error)
+            self._evict(job)
+
+    def _evict(self, job):
+        """Forget the oldest finished jobs when job finished (with the lock held)."""
+        self.cancelled.pop(job, None)
+        self.finished.append(job)
+        while len(self.finished) > self.keep:
+            del self.jobs[self.finished.popleft()]
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        self.manager.shutdown()
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    service = None
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job(self):
+        """Return the job id of the path /jobs/<id> (None if not found)."""
+        parts = self.path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+            return int(parts[1])
+        return None
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/jobs":
+            return self._reply(200, self.service.list())
+        status = self.service.status(self._job())
+        if status is None:
+            return self._reply(404, {"error": "Unknown job"})
+        self._reply(200, status)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._reply(404, {"error": "Unknown path"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job = self.service.submit(**request)
+        except (ValueError, TypeError, AttributeError) as e:
+            return self._reply(400, {"error": str(e)})
+        self._reply(201, {"id": job})
+
+    def do_DELETE(self):
+        if not self.service.cancel(self._job()):
+            return self._reply(404, {"error": "Unknown job"})
+        self._reply(200, self.service.status(self._job(), schedule=False))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=8000, host="127.0.0.1", workers=None):
+    """Run the solver service on host:port until interrupted."""
+    service = SolverService(workers)
+    handler = type("Handler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+
+    print("Serving on http://{}:{}/jobs".format(host, port), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
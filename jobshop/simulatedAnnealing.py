@@ -1,56 +1,208 @@
 from .jobshop import *
+from .evaluator import DeltaEvaluator
+from .dispatch import initialSchedules
+from .events import PrintSink, event
+from .checkpoint import saveCheckpoint
 
+from collections import deque
+import itertools
 import math
+import multiprocessing
 import random
 import time
 
 
-def getNeigbors(state, mode="normal"):
-    allNeighbors = []
+def swap(state, a, b):
+    """
+    Swap the instructions at a and b in place. Returns the first
+    changed position or None if state is unchanged.
+    """
+    if state[a] == state[b]:
+        return None
+    state[a], state[b] = state[b], state[a]
+    return min(a, b)
+
+
+def insert(state, a, b):
+    """
+    Move the instruction at a to b in place (insert(state, b, a)
+    reverts it). Returns the first changed position or None if
+    state is unchanged.
+    """
+    if a == b:
+        return None
+    state.insert(b, state.pop(a))
+    return min(a, b)
+
+
+def reverse(state, a, b):
+    """
+    Reverse the block of instructions between a and b (inclusive)
+    in place. Returns the first changed position or None if state
+    is unchanged.
+    """
+    a, b = min(a, b), max(a, b)
+    if a == b:
+        return None
+    state[a:b+1] = reversed(state[a:b+1])
+    return a
+
+
+# Neighbourhoods: operator applied to the moves of getMoves
+neighbourhoods = {
+    "normal": swap,     # adjacent swap
+    "adjacent": swap,
+    "random": swap,     # random swap
+    "insertion": insert,
+    "reversal": reverse,
+}
+
+
+def getMoves(state, mode="normal"):
+    """
+    Generate the neighborhood of state lazily as moves (i, k):
+    the neighbor is neighbourhoods[mode](state, i, k), i.e.
+    state with the instructions at i and k swapped ("normal" or
+    "adjacent": k = i + 1, "random": random k), with the
+    instruction at i moved to a random position k ("insertion")
+    or with the block between i and a random k reversed ("reversal").
+    The move is reverted by neighbourhoods[mode](state, k, i).
+    """
+    if mode not in neighbourhoods:
+        raise ValueError("Unknown neighbourhood {}".format(mode))
 
     for i in range(len(state)-1):
-        neighbor = state[:]
-        if mode == "normal":
-            swapIndex = i + 1
-        elif mode == "random":
-            swapIndex = random.randrange(len(state))
-        neighbor[i], neighbor[swapIndex] = neighbor[swapIndex], neighbor[i]
-        allNeighbors.append(neighbor)
+        if mode in ("normal", "adjacent"):
+            k = i + 1
+        else:
+            k = random.randrange(len(state))
+        yield i, k
 
-    return allNeighbors
 
-def simulatedAnnealing(jobs, T, termination, halting, mode, decrease):
+def simulatedAnnealing(jobs, T, termination, halting, mode, decrease, initial=None, sweep=0, progress=None):
+    """
+    Anneal initial (default: a random schedule) in halting * termination
+    sweeps, T is decreased before every termination sweeps.
+    Set sweep to the number of sweeps done and T to the temperature
+    after them to continue an interrupted run from initial.
+    If progress is a dict, sweep, T, schedule, cost and the state of
+    random are stored in it after every sweep (to checkpoint an
+    interrupted run, which continues exactly with them).
+    """
     numberOfJobs = len(jobs)
     numberOfMachines = len(jobs[0])
 
-    state = randomSchedule(numberOfJobs, numberOfMachines)
+    if initial is None:
+        initial = randomSchedule(numberOfJobs, numberOfMachines)
+    evaluator = DeltaEvaluator(jobs, initial)
 
-    for i in range(halting):
-        T = decrease * float(T)
+    # Moves are applied to the current schedule in place and
+    # reverted when the neighbor is rejected.
+    state = evaluator.schedule
+    actualCost = evaluator.cost
+    move = neighbourhoods[mode]
 
-        for k in range(termination):
-            actualCost = cost(jobs, state)
+    for sweep in range(sweep, halting * termination):
+        if progress is not None:
+            progress.update(sweep=sweep, T=T, schedule=state[:], cost=actualCost, random=random.getstate())
+        if sweep % termination == 0:
+            T = decrease * float(T)
+
+        for a, b in getMoves(state, mode):
+            first = move(state, a, b)
+            if first is None:
+                continue
+
+            nCost = evaluator.score(state, first)
+            # exp(-nCost/T) is tiny for makespans much larger than T, so this
+            # is almost a descent, see adaptiveAnnealingSearch for the
+            # Metropolis criterion on the change of the makespan
+            if nCost < actualCost or random.random() < math.exp(-nCost/T):
+                evaluator.accept(state, first)
+                actualCost = nCost
+            else:
+                move(state, b, a)
+
+    if progress is not None:
+        progress.update(sweep=halting * termination, T=T, schedule=state[:], cost=actualCost,
+                random=random.getstate())
+    return actualCost, state[:]
+
+
+
+# The instance of a worker process, set once by _initWorker.
+_jobs = None
+
+
+def _initWorker(jobs):
+    global _jobs
+    _jobs = jobs
 
-            for n in getNeigbors(state, mode):
-                nCost = cost(jobs, n)
-                if nCost < actualCost:
-                    state = n
-                    actualCost = nCost
-                else:
-                    probability = math.exp(-nCost/T)
-                    if random.random() < probability:
-                        state = n
-                        actualCost = nCost
 
-    return actualCost, state
+def _restart(seed, params, initial):
+    """Run simulatedAnnealing with a fixed seed in a worker process."""
+    random.seed(seed)
+    return simulatedAnnealing(_jobs, initial=initial, **params)
 
 
+def _initial(initial, i):
+    """Start schedule of restart i: the initial schedules in turn, then None (random)."""
+    if initial and i < len(initial):
+        return initial[i][:]
+    return None
 
-def simulatedAnnealingSearch(jobs, maxTime=None, T=200, termination=10, halting=10, mode="random", decrease=0.8):
+
+def serialRestarts(jobs, params, initial=None, start=0, progress=None, current=None):
+    """
+    Generate results of simulatedAnnealing(jobs, **params) forever.
+    progress holds the state of the running restart and is empty
+    between restarts (see simulatedAnnealing).
+    Set current to such a state to continue restart start from it.
+    """
+    for i in itertools.count(start):
+        if progress is not None:
+            progress.clear()
+        if current and i == start:
+            result = simulatedAnnealing(jobs, **dict(params, T=current["T"]), initial=current["schedule"],
+                    sweep=current["sweep"], progress=progress)
+        else:
+            result = simulatedAnnealing(jobs, initial=_initial(initial, i), progress=progress, **params)
+        if progress is not None:
+            progress.clear()
+        yield result
+
+
+def parallelRestarts(pool, workers, seed, params, initial=None, start=0):
+    """
+    Generate results of simulatedAnnealing(jobs, **params) computed in pool.
+    Restart i uses the seed seed + i, so the sequence of results only
+    depends on seed and not on the scheduling of the workers.
+    Set start to skip the first restarts (to resume a search).
+    """
+    pending = deque(pool.apply_async(_restart, (seed + i, params, _initial(initial, i)))
+            for i in range(start, start + workers))
+    i = start + workers
+
+    while True:
+        result = pending.popleft().get()
+        pending.append(pool.apply_async(_restart, (seed + i, params, _initial(initial, i))))
+        i += 1
+        yield result
+
+
+def simulatedAnnealingSearch(jobs, maxTime=None, T=200, termination=10, halting=10, mode="random", decrease=0.8,
+        workers=None, callback=None, initial=None, checkpoint=None, resume=None, gap=0):
     """
     Perform random search for problem instance jobs.
     Set maxTime to limit the computation time or raise
     a KeyboardInterrupt (Ctrl+C) to stop.
+    Set workers to run the restarts in a pool of worker processes.
+    The seeds of the restarts are derived from the state of random.
+    The restarts start from the initial schedules in turn
+    (see initialSchedules), then from random schedules.
+    An interrupted search saves the temperature, schedule and sweep of
+    its running restart to the checkpoint and continues it on resume.
+    With workers the running restarts are repeated from their seeds.
     """
 
     numExperiments = 1      # experiments performed per loop
@@ -60,31 +212,71 @@ def simulatedAnnealingSearch(jobs, maxTime=None, T=200, termination=10, halting=
 
     t0 = time.time()
     totalExperiments = 0
+    callback = callback or PrintSink()
 
     j = len(jobs)
     m = len(jobs[0])
-    rs = randomSchedule(j, m)
+
+    bound = lowerBound(jobs)
+    target = targetMakespan(bound, gap)
+    initial = initialSchedules(initial, jobs)
+    params = dict(T=T, termination=termination, halting=halting, mode=mode, decrease=decrease)
+    # every restart scores len(schedule) - 1 neighbors in each sweep
+    evaluationsPerExperiment = halting * termination * (j*m - 1)
+    progress = {}    # state of the running restart, see serialRestarts
+    current = None
+    if resume:
+        # continue with the counters and state of random of the checkpoint
+        best = resume.meta["best"]
+        solutions.append((best, resume.arrays["best"].tolist()))
+        totalExperiments = resume.meta["experiments"]
+        numExperiments = resume.meta["numExperiments"]
+        t0 -= resume.meta["time"]
+        random.setstate(resume.randomState)
+        if "sweep" in resume.meta:
+            current = dict(sweep=resume.meta["sweep"], T=resume.meta["T"],
+                           schedule=resume.arrays["state"].tolist())
+
+    def save():
+        meta = dict(best=best, experiments=totalExperiments, numExperiments=numExperiments,
+                    seed=seed, time=time.time() - t0)
+        arrays = dict(best=solutions[-1][1])
+        randomState = None
+        if progress:
+            # the running restart from the start of its last sweep
+            meta.update(sweep=progress["sweep"], T=progress["T"])
+            arrays["state"] = progress["schedule"]
+            randomState = progress["random"]
+        saveCheckpoint(checkpoint, "simulatedAnnealingSearch", meta, randomState, **arrays)
+
+    pool = None
+    if workers:
+        pool = multiprocessing.Pool(workers, _initWorker, (jobs,))
+        seed = resume.meta["seed"] if resume else random.randrange(2**32)
+        restarts = parallelRestarts(pool, workers, seed, params, initial, totalExperiments)
+    else:
+        seed = None
+        restarts = serialRestarts(jobs, params, initial, totalExperiments, progress, current)
 
     while True:
         try:
             start = time.time()
+            if best <= target:
+                raise OutOfTime("Lower bound reached")
 
             for i in range(numExperiments):
-                cost, schedule = simulatedAnnealing(jobs, T=T, termination=termination, halting=halting, mode=mode, decrease=decrease)
+                cost, schedule = next(restarts)
+                totalExperiments += 1
 
                 if cost < best:
                     best = cost
                     solutions.append((cost, schedule))
-
-            totalExperiments += numExperiments
-
-            if maxTime and time.time() - t0 > maxTime:
-                raise OutOfTime("Time is over")
+                    callback(event("improvement", "simulatedAnnealingSearch", t0,
+                            totalExperiments * evaluationsPerExperiment, cost, schedule))
+                    if best <= target:
+                        raise OutOfTime("Lower bound reached")
 
             t = time.time() - start
-            if t > 0:
-                print("Best:", best, "({:.1f} Experiments/s, {:.1f} s)".format(
-                        numExperiments/t, time.time() - t0))
 
             # Make outputs appear about every 3 seconds.
             if t > 4:
@@ -93,13 +285,230 @@ def simulatedAnnealingSearch(jobs, maxTime=None, T=200, termination=10, halting=
             elif t < 1.5:
                 numExperiments *= 2
 
+            if checkpoint:
+                save()
+
+            if maxTime and time.time() - t0 > maxTime:
+                raise OutOfTime("Time is over")
+
+            callback(event("batch", "simulatedAnnealingSearch", t0,
+                    totalExperiments * evaluationsPerExperiment, best, solutions[-1][1]))
+
         except (KeyboardInterrupt, OutOfTime) as e:
+            if pool:
+                pool.terminate()
+            if not solutions and progress:
+                # interrupted in the first restart
+                best = progress["cost"]
+                solutions.append((best, progress["schedule"]))
+            if checkpoint:
+                save()
+            callback(event("end", "simulatedAnnealingSearch", t0,
+                    totalExperiments * evaluationsPerExperiment, best, solutions[-1][1]))
+
+            t = time.time() - t0
             print()
             print("================================================")
-            print("Best time:", best, "  (lower bound {})".format(lowerBound(jobs)))
+            print("Best time:", best, "  (lower bound {})".format(bound))
             print("Best solution:")
             print(solutions[-1][1])
-            print("Found in {:} experiments in {:.1f}s".format(totalExperiments, time.time() - t0))
+            print("Found in {:} experiments in {:.1f}s ({:.1f} Experiments/s on {} workers)".format(
+                    totalExperiments, t, totalExperiments/t, workers or 1))
 
             return solutions[-1]
 
+
+
+def calibrateTemperature(evaluator, mode="random", samples=200, acceptance=0.5, finalAcceptance=0.01):
+    """
+    Sample random moves of the neighbourhood mode (see getMoves)
+    of the current schedule of evaluator and return
+    the temperatures (T0, Tend) at which a worse move is accepted
+    with probability acceptance (for the mean increase of the makespan)
+    and finalAcceptance (for the smallest increase).
+    """
+    state = evaluator.schedule
+    cost = evaluator.cost
+    move = neighbourhoods[mode]
+    deltas = []
+
+    for _ in range(samples):
+        a = random.randrange(len(state))
+        b = random.randrange(len(state))
+        first = move(state, a, b)
+        if first is None:
+            continue
+        c = evaluator.score(state, first)
+        move(state, b, a)
+        if c > cost:
+            deltas.append(c - cost)
+
+    if not deltas:
+        return 1.0, 0.1
+    T0 = -(sum(deltas) / len(deltas)) / math.log(acceptance)
+    Tend = -min(deltas) / math.log(finalAcceptance)
+    return T0, min(Tend, T0)
+
+
+def adaptiveAnnealingSearch(jobs, maxTime=None, mode="random", cycles=4, stagnation=10, reheat=0.5,
+        callback=None, initial=None, checkpoint=None, resume=None, gap=0):
+    """
+    Simulated annealing with a single chain which runs until maxTime
+    is over (or a KeyboardInterrupt).
+
+    Worse moves are accepted with probability exp(-delta/T) where delta
+    is the increase of the makespan. The initial temperature T0 and the
+    final temperature Tend are calibrated from sampled moves (see
+    calibrateTemperature). T is decreased geometrically after each sweep
+    of len(schedule) - 1 moves of the neighbourhood mode (see getMoves)
+    such that it reaches Tend after a cycle of about maxTime / cycles
+    seconds (30s without maxTime).
+    After a cycle, or when no move changed the makespan in stagnation
+    sweeps, the chain is reheated to reheat * T0 and continues from
+    the best schedule.
+    The chain starts from the best initial schedule (see initialSchedules).
+    An interrupted search saves the chain after its last sweep to the
+    checkpoint.
+    """
+
+    numSweeps = 1       # sweeps performed per loop
+                        # used to balance logging output
+    solutions = []   # list of (time, schedule) with decreasing time
+
+    t0 = time.time()
+    callback = callback or PrintSink()
+
+    j = len(jobs)
+    m = len(jobs[0])
+
+    if resume:
+        # continue with the state, temperature and counters of the checkpoint
+        evaluator = DeltaEvaluator(jobs, resume.arrays["state"].tolist())
+        best = resume.meta["best"]
+        solutions.append((best, resume.arrays["best"].tolist()))
+        T, T0, Tend, cooling = (resume.meta[k] for k in ("T", "T0", "Tend", "cooling"))
+        totalSweeps, frozen, reheats, evaluations, numSweeps = (resume.meta[k]
+                for k in ("sweeps", "frozen", "reheats", "evaluations", "numSweeps"))
+        t0 -= resume.meta["time"]
+        random.setstate(resume.randomState)
+    else:
+        initial = initialSchedules(initial, jobs)
+        evaluator = DeltaEvaluator(jobs, min(initial, key=lambda s: cost(jobs, s)) if initial else randomSchedule(j, m))
+        best = evaluator.cost
+        solutions.append((best, evaluator.schedule[:]))
+
+        start = time.time()
+        T0, Tend = calibrateTemperature(evaluator, mode)
+        # estimate the number of sweeps per cycle from the time per sample
+        sweepTime = max(time.time() - start, 1e-6) / 200 * (j*m - 1)
+        sweepsPerCycle = max((maxTime or 30) / cycles / sweepTime, 1)
+        cooling = (Tend / T0) ** (1 / sweepsPerCycle)
+
+        T = T0
+        totalSweeps = 0
+        frozen = 0       # sweeps without a change of the makespan
+        reheats = 0
+        evaluations = evaluator.evaluations
+
+    # Moves are applied to the current schedule in place and
+    # reverted when the neighbor is rejected.
+    state = evaluator.schedule
+    actualCost = evaluator.cost
+    move = neighbourhoods[mode]
+    bound = lowerBound(jobs)
+    target = targetMakespan(bound, gap)
+
+    def snapshot():
+        # a move can be interrupted halfway, so the chain and random are saved after a sweep
+        return (dict(T=T, sweeps=totalSweeps, frozen=frozen, reheats=reheats, evaluations=evaluations),
+                state[:], random.getstate())
+
+    def save():
+        meta, chain, randomState = chainState
+        saveCheckpoint(checkpoint, "adaptiveAnnealingSearch",
+                dict(meta, best=best, T0=T0, Tend=Tend, cooling=cooling,
+                     numSweeps=numSweeps, time=time.time() - t0),
+                randomState, state=chain, best=solutions[-1][1])
+
+    chainState = snapshot()
+
+    while True:
+        try:
+            start = time.time()
+            if best <= target:
+                raise OutOfTime("Lower bound reached")
+
+            for sweep in range(numSweeps):
+                if maxTime and time.time() - t0 > maxTime:
+                    break
+                changed = False
+
+                for a, b in getMoves(state, mode):
+                    first = move(state, a, b)
+                    if first is None:
+                        continue
+
+                    nCost = evaluator.score(state, first)
+                    evaluations += 1
+                    delta = nCost - actualCost
+                    if delta <= 0 or random.random() < math.exp(-delta / T):
+                        evaluator.accept(state, first)
+                        changed = changed or delta != 0
+                        actualCost = nCost
+
+                        if actualCost < best:
+                            best = actualCost
+                            solutions.append((best, state[:]))
+                            callback(event("improvement", "adaptiveAnnealingSearch", t0,
+                                    evaluations, best, solutions[-1][1]))
+                            if best <= target:
+                                raise OutOfTime("Lower bound reached")
+                    else:
+                        move(state, b, a)
+
+                totalSweeps += 1
+                T *= cooling
+                frozen = 0 if changed else frozen + 1
+
+                if T < Tend or frozen >= stagnation:
+                    # reheat and continue from the best schedule
+                    evaluator.reset(solutions[-1][1])
+                    state = evaluator.schedule
+                    actualCost = evaluator.cost
+                    T = reheat * T0
+                    frozen = 0
+                    reheats += 1
+
+                chainState = snapshot()
+
+            t = time.time() - start
+
+            # Make outputs appear about every 3 seconds.
+            if t > 4:
+                numSweeps = max(numSweeps // 2, 1)
+            elif t < 1.5:
+                numSweeps *= 2
+
+            if checkpoint:
+                save()
+
+            if maxTime and time.time() - t0 > maxTime:
+                raise OutOfTime("Time is over")
+
+            callback(event("batch", "adaptiveAnnealingSearch", t0, evaluations, best, solutions[-1][1]))
+
+        except (KeyboardInterrupt, OutOfTime) as e:
+            if checkpoint:
+                save()
+            callback(event("end", "adaptiveAnnealingSearch", t0, evaluations, best, solutions[-1][1]))
+
+            t = time.time() - t0
+            print()
+            print("================================================")
+            print("Best time:", best, "  (lower bound {})".format(bound))
+            print("Best solution:")
+            print(solutions[-1][1])
+            print("Found in {:} sweeps with {} reheats in {:.1f}s (T0 = {:.1f}, T = {:.1f})".format(
+                    totalSweeps, reheats, t, T0, T))
+
+            return solutions[-1]
@@ -0,0 +1,166 @@
+from .jobshop import *
+from .graph import DisjunctiveGraph
+from .dispatch import initialSchedules
+from .events import PrintSink, event
+
+import random
+import time
+
+
+class TabuList:
+    """
+    Fixed size tabu list of move attributes.
+    The attributes are kept in a ring buffer (to forget the oldest one)
+    and counted in a dict for O(1) lookup.
+    """
+
+    def __init__(self, size):
+        self.buffer = [None]*size
+        self.index = 0
+        self.count = {}
+
+    def add(self, attribute):
+        old = self.buffer[self.index]
+        if old is not None:
+            self.count[old] -= 1
+            if self.count[old] == 0:
+                del self.count[old]
+
+        self.buffer[self.index] = attribute
+        self.count[attribute] = self.count.get(attribute, 0) + 1
+        self.index = (self.index + 1) % len(self.buffer)
+
+    def __contains__(self, attribute):
+        return attribute in self.count
+
+
+def moveOrders(graph, move):
+    """
+    Return (destroyed, created) for a move (machine, i, k):
+    the order "u before v" of the moved operation u and the operation v
+    it passes which is reversed by the move.
+    """
+    machine, i, k = move
+    sequence = graph.sequences[machine]
+    u = sequence[i]
+    v = sequence[k]
+    if i < k:
+        return (u, v), (v, u)
+    return (v, u), (u, v)
+
+
+def tabuSearch(jobs, maxTime=None, tenure=10, neighborhood="N5", maxStagnation=2000, callback=None,
+        initial=None, gap=0):
+    """
+    Perform tabu search for problem instance jobs.
+    Set maxTime to limit the computation time or raise
+    a KeyboardInterrupt (Ctrl+C) to stop.
+
+    In each iteration the best non tabu move of the critical block
+    neighborhood (N5 or N6, see graph.py) is applied. The moves are
+    ranked by their estimated makespan (see moveEstimate), only the
+    applied move is evaluated exactly. A move is tabu
+    if it restores an order of two operations which was reversed in
+    the last tenure iterations, unless it leads to a new best solution
+    (aspiration). After maxStagnation iterations without improvement
+    the search continues from the best solution.
+    The search starts from the best initial schedule (see
+    initialSchedules) or a random schedule.
+    """
+
+    numIterations = 100     # iterations performed per loop
+                            # used to balance logging output
+    solutions = []   # list of (time, schedule) with decreasing time
+
+    t0 = time.time()
+    totalIterations = 0
+    callback = callback or PrintSink()
+
+    j = len(jobs)
+    m = len(jobs[0])
+    bound = lowerBound(jobs)
+    target = targetMakespan(bound, gap)
+
+    graphs = [DisjunctiveGraph.fromSchedule(jobs, s) for s in initialSchedules(initial, jobs)]
+    graphs = graphs or [DisjunctiveGraph.fromSchedule(jobs, randomSchedule(j, m))]
+    evaluations = len(graphs)
+    graph = min(graphs, key=lambda graph: graph.makespan)
+    best = graph.makespan
+    bestGraph = graph.copy()
+    solutions.append((best, graph.toSchedule()))
+
+    tabu = TabuList(tenure)
+    stagnation = 0
+
+    while True:
+        try:
+            start = time.time()
+
+            for i in range(numIterations):
+                bestMove = None
+                bestMoveCost = None
+
+                for move in graph.neighbors(neighborhood):
+                    destroyed, created = moveOrders(graph, move)
+                    c = graph.moveEstimate(move)
+                    evaluations += 1
+
+                    if created in tabu and c >= best:
+                        continue
+                    if bestMoveCost is None or c < bestMoveCost:
+                        bestMove, bestMoveCost = (move, destroyed), c
+
+                if bestMove is None:
+                    # no critical moves: the schedule is optimal
+                    if not graph.neighbors(neighborhood):
+                        raise OutOfTime("Optimal solution found")
+                    # all moves are tabu: take a random one
+                    move = random.choice(graph.neighbors(neighborhood))
+                    bestMove = (move, moveOrders(graph, move)[0])
+
+                move, destroyed = bestMove
+                graph.applyMove(move)
+                tabu.add(destroyed)
+
+                if graph.makespan < best:
+                    best = graph.makespan
+                    bestGraph = graph.copy()
+                    solutions.append((best, graph.toSchedule()))
+                    stagnation = 0
+                    callback(event("improvement", "tabuSearch", t0, evaluations, best, solutions[-1][1]))
+                else:
+                    stagnation += 1
+                    if stagnation >= maxStagnation:
+                        graph = bestGraph.copy()
+                        stagnation = 0
+
+                totalIterations += 1
+
+                if best <= target:
+                    raise OutOfTime("Lower bound reached")
+
+            if maxTime and time.time() - t0 > maxTime:
+                raise OutOfTime("Time is over")
+
+            callback(event("batch", "tabuSearch", t0, evaluations, best, solutions[-1][1]))
+
+            t = time.time() - start
+
+            # Make outputs appear about every 3 seconds.
+            if t > 4:
+                numIterations //= 2
+                numIterations = max(numIterations, 1)
+            elif t < 1.5:
+                numIterations *= 2
+
+        except (KeyboardInterrupt, OutOfTime) as e:
+            callback(event("end", "tabuSearch", t0, evaluations, best, solutions[-1][1]))
+
+            print()
+            print("================================================")
+            print("Best time:", best, "  (lower bound {})".format(bound))
+            print("Best solution:")
+            print(solutions[-1][1])
+            print("Found in {:} iterations in {:.1f}s".format(totalIterations, time.time() - t0))
+
+            return solutions[-1]
@@ -1,9 +1,16 @@
 from jobshop import *
 from jobshop import geneticSearch
+from jobshop.batch import algorithms, batchSolve, formatResult, instancePaths
+from jobshop.checkpoint import loadCheckpoint
+from jobshop.service import serve
 
 from functools import partial
+import json
 import optparse
+import os
 import random
+import signal
+import sys
 
 # TODO: make command line program
 
@@ -13,7 +20,7 @@ if __name__ == '__main__':
 
     parser.add_option('-a', '--algorithm',
         action="store", dest="algorithm",
-        help="Choose Algorith: SA (Simulated Annealing), GS (GeneticSearch)", default="GS")
+        help="Choose Algorith: RS (Random Search), SA (Simulated Annealing), ASA (Adaptive Simulated Annealing), GS (GeneticSearch), TS (Tabu Search), DR (Dispatching Rules)", default="GS")
 
     parser.add_option('-s', '--select',
         action="store", dest="select",
@@ -21,15 +28,15 @@ if __name__ == '__main__':
 
     parser.add_option('-r', '--recombine',
         action="store", dest="recombine",
-        help="Choose Selectionmethod: first, crossover", default="crossover")
+        help="Choose Recombinationmethod: first, crossover, partial (crossover without repair), jox, gox, ppx", default="crossover")
 
     parser.add_option('-m', '--mutate',
         action="store", dest="mutate",
-        help="Choose Mutationmethod: permutate, swap", default="permutate")
+        help="Choose Mutationmethod: permutate, swap, local (memetic)", default="permutate")
 
     parser.add_option('-n', '--neighbourhood',
         action="store", dest="neighbourhood",
-        help="Choose Mode for neighbourhood: random, normal", default="random")
+        help="Choose Mode for neighbourhood of SA: random (swap), normal (adjacent swap), insertion, reversal", default="random")
 
     parser.add_option('-t', '--temp',
         action="store", dest="temperature",
@@ -55,36 +62,87 @@ if __name__ == '__main__':
         action="store", dest="file",
         help="Choose Path to file", default='instances/abz5')
 
+    parser.add_option('-i', '--islands',
+        action="store", dest="islands",
+        help="Choose Number of islands (processes) for GS, 0: single population", default=0)
+
+    parser.add_option('-k', '--migration',
+        action="store", dest="migration",
+        help="Choose Number of generations between migrations of islands", default=10)
+
+    parser.add_option('-w', '--workers',
+        action="store", dest="workers",
+        help="Choose Number of worker processes for SA restarts, 0: serial", default=0)
+
+    parser.add_option('-j', '--events',
+        action="store", dest="events",
+        help="Choose Path to write progress events as JSON lines to", default=None)
+
+    parser.add_option('-x', '--cache',
+        action="store", dest="cache",
+        help="Choose Number of makespans cached by GS, 0: no cache", default=0)
+
+    parser.add_option('-T', '--time',
+        action="store", dest="time",
+        help="Choose time budget in seconds (per instance in batch mode)", default=20)
+
+    parser.add_option('-b', '--batch',
+        action="store", dest="batch",
+        help="Choose directory or glob of instances to solve in batch mode, e.g. 'instances/*'", default=None)
+
+    parser.add_option('--jobs',
+        action="store", dest="jobs",
+        help="Choose Number of worker processes in batch and service mode, 0: number of cpus", default=0)
+
+    parser.add_option('--decoder',
+        action="store", dest="decoder",
+        help="Choose schedule decoder for GS and RS: semiactive, active, partial", default="semiactive")
+
+    parser.add_option('--serve',
+        action="store", dest="serve",
+        help="Choose port to run the HTTP solver service on (see jobshop/service.py)", default=None)
+
+    parser.add_option('--initial',
+        action="store", dest="initial",
+        help="Choose Path to a previous schedule (JSON list) to re-optimise from", default=None)
+
+    parser.add_option('--checkpoint',
+        action="store", dest="checkpoint",
+        help="Choose Path to save a checkpoint of GS, SA or ASA to after each batch", default=None)
+
+    parser.add_option('--resume',
+        action="store_true", dest="resume",
+        help="Resume GS, SA or ASA from the checkpoint (see --checkpoint)", default=False)
+
+    parser.add_option('--start',
+        action="store", dest="start",
+        help="Choose initial schedules: random, dispatch (dispatching rules)", default="random")
+
+    parser.add_option('--gap',
+        action="store", dest="gap",
+        help="Stop as soon as the best time is within this fraction of the lower bound", default=0)
+
     options, args = parser.parse_args()
 
     #abz5 = 'instances/abz5'
     #vorlesungsbeispiel = 'instances/vorlesungsbeispiel'
     #tai01 = 'instances/tai01'  # upper boulnd: 1231, lower bound 1005
 
-    jobs = readJobs(options.file)
-
-    m = len(jobs[0])
-    j = len(jobs)
-    print("Chosen file:", options.file)
-    print("Chosen algorithm:", options.algorithm)
-    print("Number of machines:", m)
-    print("Number of jobs:", j)
-    # printJobs(jobs)
-
-    # rs = randomSchedule(j, m)
-    # print(cost(jobs, rs))
-
-    # cost, solution = randomSearch(jobs, maxTime=20)
     if str(options.seed).isdigit():
-        random.seed(int(options.seed))
+        seed = int(options.seed)
     else:
         print("No valid seed, default: 1")
-        random.seed(1)
+        seed = 1
+    random.seed(seed)
+
+    maxTime = float(options.time)
 
     if options.neighbourhood == "random":
         neighbourhood = "random"
     elif options.neighbourhood == "normal":
         neighbourhood = "normal"
+    elif options.neighbourhood in ("insertion", "reversal"):
+        neighbourhood = options.neighbourhood
     else:
         print("No valid neighbourhood chosen, default: random")
         neighbourhood = "random"
@@ -125,24 +183,122 @@ if __name__ == '__main__':
         recombine = geneticSearch.recombine_first
     elif options.recombine == "crossover":
         recombine = geneticSearch.recombine_simpleCrossover
+    elif options.recombine == "partial":
+        # partial schedules can only be evaluated by the partial decoder
+        recombine = geneticSearch.recombine_partialCrossover
+        options.decoder = "partial"
+    elif options.recombine == "jox":
+        recombine = geneticSearch.recombine_jox
+    elif options.recombine == "gox":
+        recombine = geneticSearch.recombine_gox
+    elif options.recombine == "ppx":
+        recombine = geneticSearch.recombine_ppx
     else:
         print("No valid recombine method chosen, default: crossover")
         recombine = geneticSearch.recombine_simpleCrossover
 
     if options.mutate == "swap":
         mutate = partial(geneticSearch.mutate_swap, num_swaps=10)
+    elif options.mutate == "local":
+        mutate = partial(geneticSearch.mutate_localSearch, maxSteps=1)
     elif options.mutate == "permutate":
         mutate = partial(geneticSearch.mutate_permuteSubsequence, max_shuffle_fraction=8)
     else:
         print("No valid mutation method chosen, default: permutate")
 
-    if options.algorithm == "GS":
-        cost, solution = geneticSearchTemplate(jobs, select=select, recombine=recombine, mutate=mutate, maxTime=20)
-    elif options.algorithm == "SA":
-        cost, solution = simulatedAnnealingSearch(jobs, maxTime=20, T=int(temperature), termination=int(termination), halting=int(halting), mode=neighbourhood, decrease=float(decrease))
-    else:
+    if options.algorithm not in algorithms:
         print("No valid algorithm chosen, default: GS")
-        cost, solution = geneticSearchTemplate(jobs, select=select, recombine=recombine, mutate=mutate, maxTime=20)
+        options.algorithm = "GS"
+
+    kwargs = {
+        "RS": dict(decoder=options.decoder),
+        "GS": dict(select=select, recombine=recombine, mutate=mutate, cache=int(options.cache),
+                decoder=options.decoder),
+        "SA": dict(T=int(temperature), termination=int(termination), halting=int(halting),
+                mode=neighbourhood, decrease=float(decrease)),
+        "ASA": dict(mode=neighbourhood),
+        "TS": dict(),
+        "DR": dict(),
+    }[options.algorithm]
+
+    kwargs["gap"] = float(options.gap)
+
+    if options.start == "dispatch" and options.algorithm != "DR":
+        kwargs["initial"] = "dispatch"
+
+    if options.serve:
+        serve(int(options.serve), workers=int(options.jobs) or None)
+        sys.exit()
+
+    if options.batch:
+        # one line per instance as soon as it is solved
+        print("name\talgorithm\tseed\tbest\tlowerBound\tevaluations/s", flush=True)
+        for result in batchSolve(instancePaths(options.batch), options.algorithm, seed, maxTime,
+                workers=int(options.jobs) or None, kwargs=kwargs):
+            print(formatResult(result), flush=True)
+        sys.exit()
+
+    jobs = loadInstance(options.file).toJobs()
+
+    m = len(jobs[0])
+    j = len(jobs)
+    print("Chosen file:", options.file)
+    print("Chosen algorithm:", options.algorithm)
+    print("Number of machines:", m)
+    print("Number of jobs:", j)
+    # printJobs(jobs)
+
+    # rs = randomSchedule(j, m)
+    # print(cost(jobs, rs))
+
+    # cost, solution = randomSearch(jobs, maxTime=20)
+
+    callback = JsonLinesSink(options.events) if options.events else None
+
+    if options.initial:
+        if options.algorithm == "DR":
+            print("DR can not start from the initial schedules of --initial")
+            sys.exit(1)
+        with open(options.initial) as f:
+            kwargs["initial"] = warmStart(jobs, json.load(f))
+
+    if options.checkpoint and options.algorithm == "GS" and int(options.islands) > 0:
+        print("GS with islands (-i) can not be checkpointed, remove --checkpoint")
+        sys.exit(1)
+
+    if options.checkpoint and options.algorithm in ("GS", "SA", "ASA"):
+        kwargs["checkpoint"] = options.checkpoint
+        # preemption sends SIGTERM, stop like on Ctrl+C
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+        if options.resume and not os.path.exists(options.checkpoint):
+            print("No checkpoint at {}, starting a new search".format(options.checkpoint))
+        elif options.resume:
+            checkpoint = loadCheckpoint(options.checkpoint)
+            if checkpoint.algorithm != {"GS": "geneticSearchTemplate", "SA": "simulatedAnnealingSearch",
+                    "ASA": "adaptiveAnnealingSearch"}[options.algorithm]:
+                print("Checkpoint of {} can not be resumed with {}".format(checkpoint.algorithm, options.algorithm))
+                sys.exit(1)
+            print("Resuming {} after {:.1f}s, best: {}".format(
+                    checkpoint.algorithm, checkpoint.meta["time"], checkpoint.meta["best"]))
+            kwargs["resume"] = checkpoint
+
+    if options.algorithm == "RS":
+        cost, solution = randomSearch(jobs, maxTime=maxTime, callback=callback, **kwargs)
+    elif options.algorithm == "GS" and int(options.islands) > 0:
+        cost, solution = geneticSearchIslands(jobs, maxTime=maxTime, islands=int(options.islands),
+                migrationInterval=int(options.migration), callback=callback, **kwargs)
+    elif options.algorithm == "GS":
+        cost, solution = geneticSearchTemplate(jobs, maxTime=maxTime, callback=callback, **kwargs)
+    elif options.algorithm == "SA":
+        cost, solution = simulatedAnnealingSearch(jobs, maxTime=maxTime, workers=int(options.workers),
+                callback=callback, **kwargs)
+    elif options.algorithm == "ASA":
+        cost, solution = adaptiveAnnealingSearch(jobs, maxTime=maxTime, callback=callback, **kwargs)
+    elif options.algorithm == "TS":
+        cost, solution = tabuSearch(jobs, maxTime=maxTime, callback=callback, **kwargs)
+    elif options.algorithm == "DR":
+        cost, solution = dispatchSearch(jobs, maxTime=maxTime, callback=callback, **kwargs)
 
 
 
@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+from jobshop import loadInstance
+
+instances = os.path.join(os.path.dirname(__file__), "..", "instances")
+
+
+@pytest.fixture
+def instance():
+    """Return a function which loads a bundled instance by name as jobs."""
+    def load(name):
+        return loadInstance(os.path.join(instances, name), sidecar=False).toJobs()
+    return load
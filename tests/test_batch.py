@@ -0,0 +1,26 @@
+import os
+
+from jobshop import cost, recombine_jox
+from jobshop.batch import algorithms, batchSolve, instancePaths, solveInstance
+
+instances = os.path.join(os.path.dirname(__file__), "..", "instances")
+
+
+def test_instancePaths():
+    paths = instancePaths(instances)
+    assert [os.path.basename(path) for path in paths] == sorted(name for name in os.listdir(instances) if not name.startswith("."))
+    assert instancePaths(os.path.join(instances, "la*")) == [os.path.join(instances, "la01"), os.path.join(instances, "la16")]
+
+
+def test_solveInstance(instance):
+    result = solveInstance(os.path.join(instances, "la01"), "DR", 1, 0.2, {})
+    assert result["name"] == "la01"
+    assert result["lowerBound"] <= result["best"] == cost(instance("la01"), result["schedule"])
+
+
+def test_batchSolve():
+    paths = [os.path.join(instances, name) for name in ("la01", "vorlesungsbeispiel")]
+    for algorithm in algorithms:
+        kwargs = dict(recombine=recombine_jox) if algorithm == "GS" else None
+        results = list(batchSolve(paths, algorithm, 1, 0.2, workers=2, kwargs=kwargs))
+        assert sorted(result["name"] for result in results) == ["la01", "vorlesungsbeispiel"]
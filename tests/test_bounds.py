@@ -0,0 +1,52 @@
+import itertools
+import random
+
+import pytest
+
+from jobshop import cost, lowerBound, targetMakespan
+from jobshop.bounds import jacksonBound, jobBound, machineBound, twoJobBound, twoJobs
+
+
+def randomJobs(j, m, seed, shortest=0):
+    random.seed(seed)
+    return [[(machine, random.randint(shortest, 9)) for machine in random.sample(range(m), m)] for _ in range(j)]
+
+
+def optimum(jobs):
+    """Optimal makespan of all semi-active schedules (brute force)."""
+    tasks = [i for i in range(len(jobs)) for _ in jobs[0]]
+    return min(cost(jobs, list(s)) for s in set(itertools.permutations(tasks)))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_twoJobsIsOptimal(seed):
+    # exact without tasks of zero processing time
+    jobs = randomJobs(2, 4, seed, 1)
+    assert twoJobs(*jobs) == twoJobBound(jobs) == optimum(jobs)
+    jobs = randomJobs(2, 4, seed)
+    assert twoJobs(*jobs) <= optimum(jobs)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_boundsBelowOptimum(seed):
+    jobs = randomJobs(3, 3, seed)
+    best = optimum(jobs)
+    assert machineBound(jobs) <= jacksonBound(jobs) <= best
+    assert jobBound(jobs) <= jacksonBound(jobs)
+    assert twoJobBound(jobs) <= best
+    assert lowerBound(jobs) == max(jacksonBound(jobs), twoJobBound(jobs)) <= best
+
+
+def test_twoJobBoundLimits():
+    jobs = randomJobs(6, 4, 0)
+    full = twoJobBound(jobs)
+    assert twoJobBound(jobs, pairs=0) == jobBound(jobs)
+    assert jobBound(jobs) <= twoJobBound(jobs, pairs=1) <= full
+    # pairs not longer than bound are skipped
+    assert twoJobBound(jobs, 10**6) == 10**6
+
+
+def test_lowerBound(instance):
+    jobs = instance("la01")
+    assert lowerBound(jobs) == 666
+    assert targetMakespan(666, 0.01) == pytest.approx(672.66)
@@ -0,0 +1,89 @@
+import random
+import signal
+
+import pytest
+
+from jobshop import adaptiveAnnealingSearch, checkSchedule, simulatedAnnealingSearch
+from jobshop.checkpoint import loadCheckpoint, saveCheckpoint
+from jobshop.simulatedAnnealing import simulatedAnnealing
+
+
+@pytest.fixture
+def interruptAfter():
+    """Return a function which raises a KeyboardInterrupt in the main thread after seconds."""
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt()
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    try:
+        yield lambda seconds: signal.setitimer(signal.ITIMER_REAL, seconds)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def test_roundTrip(tmp_path):
+    path = str(tmp_path / "checkpoint.npz")
+    random.seed(1)
+    state = random.getstate()
+    saveCheckpoint(path, "search", dict(best=12, T=1.5), best=[0, 1, 1, 0])
+    expected = random.random()
+
+    checkpoint = loadCheckpoint(path)
+    assert checkpoint.algorithm == "search"
+    assert checkpoint.meta == dict(best=12, T=1.5)
+    assert checkpoint.arrays["best"].tolist() == [0, 1, 1, 0]
+    assert checkpoint.randomState == state
+    random.setstate(checkpoint.randomState)
+    assert random.random() == expected
+
+
+# abz5 can not reach its lower bound, so the searches only stop on the interrupt
+def test_resumeRestartExactly(instance, tmp_path, interruptAfter):
+    jobs = instance("abz5")
+    path = str(tmp_path / "sa.npz")
+    # hot enough that the chain still moves when it is interrupted
+    params = dict(T=100000, termination=10, halting=60, mode="random", decrease=0.95)
+
+    random.seed(2)
+    interruptAfter(0.3)
+    simulatedAnnealingSearch(jobs, checkpoint=path, **params)
+    checkpoint = loadCheckpoint(path)
+    assert checkpoint.meta["experiments"] == 0 and 0 < checkpoint.meta["sweep"] < 600
+
+    # the first restart without and with the interrupt
+    random.seed(2)
+    expected = simulatedAnnealing(jobs, **params)
+    random.setstate(checkpoint.randomState)
+    assert simulatedAnnealing(jobs, **dict(params, T=checkpoint.meta["T"]),
+            initial=checkpoint.arrays["state"].tolist(), sweep=checkpoint.meta["sweep"]) == expected
+
+
+def test_interruptedRestart(instance, tmp_path, interruptAfter):
+    jobs = instance("abz5")
+    path = str(tmp_path / "sa.npz")
+    params = dict(T=200, termination=10, halting=1000)
+
+    interruptAfter(0.3)
+    simulatedAnnealingSearch(jobs, checkpoint=path, **params)
+    first = loadCheckpoint(path)
+    assert first.meta["experiments"] == 0
+    assert 0 < first.meta["sweep"] < 10000 and first.meta["T"] < 200
+    checkSchedule(10, 10, first.arrays["state"].tolist())
+
+    interruptAfter(0.3)
+    simulatedAnnealingSearch(jobs, checkpoint=path, resume=first, **params)
+    second = loadCheckpoint(path)
+    assert second.meta["experiments"] == 0
+    assert second.meta["sweep"] > first.meta["sweep"]
+    assert second.meta["T"] <= first.meta["T"]
+
+
+def test_interruptedChain(instance, tmp_path, interruptAfter):
+    jobs = instance("abz5")
+    path = str(tmp_path / "asa.npz")
+
+    interruptAfter(0.5)
+    adaptiveAnnealingSearch(jobs, maxTime=60, checkpoint=path)
+    checkpoint = loadCheckpoint(path)
+    assert checkpoint.meta["sweeps"] > 0
+    checkSchedule(10, 10, checkpoint.arrays["state"].tolist())
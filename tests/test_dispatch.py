@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from jobshop import ActiveEvaluator, checkSchedule, cost, dispatch, dispatchSchedules, initialSchedules
+from jobshop.dispatch import rules
+
+
+@pytest.mark.parametrize("rule", sorted(rules))
+def test_dispatchIsActive(instance, rule):
+    jobs = instance("abz5")
+    evaluator = ActiveEvaluator(jobs)
+    random.seed(0)
+    for rcl in (1, 3):
+        schedule = dispatch(jobs, rule, rcl)
+        checkSchedule(len(jobs), len(jobs[0]), schedule)
+        # the active decoder can not improve an active schedule
+        assert evaluator.evaluate(schedule) == cost(jobs, schedule)
+
+
+def test_dispatchSchedules(instance):
+    jobs = instance("la01")
+    random.seed(0)
+    assert dispatchSchedules(jobs, 2) == [dispatch(jobs, "MWKR"), dispatch(jobs, "MOPNR")]
+    schedules = dispatchSchedules(jobs, 8)
+    assert len(schedules) == 8
+    for schedule in schedules:
+        checkSchedule(10, 5, schedule)
+
+
+def test_initialSchedules(instance):
+    jobs = instance("la01")
+    assert initialSchedules(None) == []
+    assert initialSchedules([]) == []
+    schedule = dispatch(jobs)
+    assert initialSchedules(schedule) == [schedule]
+    assert initialSchedules(schedule)[0] is not schedule
+    assert initialSchedules([schedule, schedule[::-1]]) == [schedule, schedule[::-1]]
+    assert len(initialSchedules("dispatch", jobs, 3)) == 3
+    with pytest.raises(ValueError):
+        initialSchedules("random", jobs)
@@ -0,0 +1,66 @@
+import random
+
+from jobshop import ActiveEvaluator, CachedEvaluator, DeltaEvaluator, Evaluator, cost, makeEvaluator, randomSchedule
+
+
+def schedules(jobs, count=10):
+    random.seed(0)
+    return [randomSchedule(len(jobs), len(jobs[0])) for _ in range(count)]
+
+
+def test_evaluatorEqualsCost(instance):
+    jobs = instance("abz5")
+    evaluator = Evaluator(jobs)
+    costs = [cost(jobs, s) for s in schedules(jobs)]
+    assert [evaluator.evaluate(s) for s in schedules(jobs)] == costs
+    assert evaluator.evaluateBatch(schedules(jobs)) == costs
+    assert evaluator.evaluations == 20
+
+
+def test_activeEvaluator(instance):
+    jobs = instance("abz5")
+    evaluator = ActiveEvaluator(jobs)
+    for s in schedules(jobs):
+        c = evaluator.evaluate(s)
+        assert c <= cost(jobs, s)
+        assert cost(jobs, evaluator.decode(s)) == c
+    assert evaluator.evaluateBatch(schedules(jobs)) == [evaluator.evaluate(s) for s in schedules(jobs)]
+
+
+def test_cachedEvaluatorCounts(instance):
+    jobs = instance("la01")
+    for decoder in ("semiactive", "active"):
+        evaluator = makeEvaluator(jobs, decoder, 1000)
+        assert isinstance(evaluator, CachedEvaluator)
+        costs = evaluator.evaluateBatch(schedules(jobs))
+        assert (evaluator.hits, evaluator.misses, len(evaluator.cache)) == (0, 10, 10)
+
+        assert evaluator.evaluateBatch(schedules(jobs)) == costs
+        assert (evaluator.hits, evaluator.misses, evaluator.evaluations) == (10, 10, 20)
+        assert evaluator.hitRate == 0.5
+
+        assert evaluator.evaluate(schedules(jobs)[0]) == costs[0]
+        assert (evaluator.hits, evaluator.misses, evaluator.evaluations) == (11, 10, 21)
+
+
+def test_deltaEvaluatorReplay(instance):
+    jobs = instance("abz5")
+    schedule = schedules(jobs, 1)[0]
+    evaluator = DeltaEvaluator(jobs, schedule, stride=7)
+    assert evaluator.cost == cost(jobs, schedule)
+
+    for _ in range(200):
+        a, b = sorted(random.sample(range(len(schedule)), 2))
+        candidate = evaluator.schedule[:]
+        candidate[a], candidate[b] = candidate[b], candidate[a]
+        c = cost(jobs, candidate)
+
+        assert evaluator.score(candidate, a) == c
+        # bounded replay is exact below bound and at least bound otherwise
+        bound = evaluator.cost
+        score = evaluator.score(candidate, a, bound)
+        assert score == c if c < bound else score >= bound
+
+        if random.random() < 0.5:
+            assert evaluator.accept(candidate, a) == c
+            assert evaluator.schedule == candidate
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from jobshop import cost, dispatch, geneticSearch, geneticSearchTemplate, lowerBound, makeEvaluator, randomSchedule
+from jobshop.events import MemorySink
+
+recombines = ["simpleCrossover", "jox", "gox", "ppx"]
+
+
+@pytest.mark.parametrize("name", recombines)
+def test_recombineIsValid(instance, name):
+    jobs = instance("abz5")
+    recombine = getattr(geneticSearch, "recombine_" + name)
+    random.seed(0)
+    for _ in range(100):
+        s1 = randomSchedule(len(jobs), len(jobs[0]))
+        s2 = randomSchedule(len(jobs), len(jobs[0]))
+        child = recombine(jobs, s1, s2)
+        assert sorted(child) == sorted(s1)
+
+
+def test_partialCrossover(instance):
+    jobs = instance("abz5")
+    evaluator = makeEvaluator(jobs, "partial")
+    random.seed(0)
+    for _ in range(100):
+        s1 = randomSchedule(len(jobs), len(jobs[0]))
+        s2 = randomSchedule(len(jobs), len(jobs[0]))
+        child = geneticSearch.recombine_partialCrossover(jobs, s1, s2)
+        assert sorted(evaluator.decode(child)) == sorted(s1)
+
+
+def test_geneticSearchPartial(instance):
+    jobs = instance("la01")
+    random.seed(0)
+    sink = MemorySink()
+    best, schedule = geneticSearchTemplate(jobs, geneticSearch.recombine_partialCrossover,
+            geneticSearch.mutate_swap, maxTime=0.5, decoder="partial", callback=sink)
+    assert sorted(schedule) == sorted(randomSchedule(len(jobs), len(jobs[0])))
+    assert lowerBound(jobs) <= best == cost(jobs, schedule) == sink.events[-1].best
+
+
+@pytest.mark.parametrize("decoder", ["semiactive", "active"])
+def test_partialCrossoverRequiresPartialDecoder(instance, decoder):
+    jobs = instance("la01")
+    for search in (geneticSearchTemplate, geneticSearch.geneticSearchIslands):
+        with pytest.raises(ValueError):
+            search(jobs, geneticSearch.recombine_partialCrossover, maxTime=0.1, decoder=decoder)
+
+
+def test_geneticSearchIslands(instance):
+    jobs = instance("abz5")
+    start = dispatch(jobs)
+    random.seed(0)
+    sink = MemorySink()
+    best, schedule = geneticSearch.geneticSearchIslands(jobs, geneticSearch.recombine_jox, geneticSearch.mutate_swap,
+            maxTime=1, islands=2, migrationInterval=2, cache=1000, initial=[start], callback=sink)
+    assert sorted(schedule) == sorted(start)
+    assert lowerBound(jobs) <= best == cost(jobs, schedule) <= cost(jobs, start)
+    assert sink.events[-1].kind == "end" and sink.events[-1].best == best
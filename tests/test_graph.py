@@ -0,0 +1,40 @@
+import random
+
+from jobshop import DisjunctiveGraph, cost, randomSchedule
+
+
+def randomGraphs(jobs, count=20):
+    random.seed(0)
+    for _ in range(count):
+        schedule = randomSchedule(len(jobs), len(jobs[0]))
+        yield schedule, DisjunctiveGraph.fromSchedule(jobs, schedule)
+
+
+def test_makespanEqualsCost(instance):
+    jobs = instance("abz5")
+    for schedule, graph in randomGraphs(jobs):
+        assert graph.makespan == cost(jobs, schedule)
+        assert cost(jobs, graph.toSchedule()) == graph.makespan
+
+
+def test_moveCostEqualsApplyMove(instance):
+    jobs = instance("abz5")
+    for _, graph in randomGraphs(jobs):
+        for kind in ("N5", "N6"):
+            for move in graph.neighbors(kind):
+                sequences = [s[:] for s in graph.sequences]
+                c = graph.moveCost(move)
+                assert graph.sequences == sequences
+
+                moved = graph.copy()
+                assert moved.applyMove(move) == c
+                assert cost(jobs, moved.toSchedule()) == c
+                moved.revertMove(move)
+                assert moved.sequences == sequences
+
+
+def test_moveEstimateBoundsN5(instance):
+    jobs = instance("la01")
+    for _, graph in randomGraphs(jobs):
+        for move in graph.neighbors("N5"):
+            assert graph.moveEstimate(move) <= graph.moveCost(move)
@@ -0,0 +1,40 @@
+import os
+
+from jobshop import Instance, cost, cost_batch, loadInstance, parseInstance, randomSchedule, readJobs
+from jobshop.instance import sidecarPath
+
+instances = os.path.join(os.path.dirname(__file__), "..", "instances")
+
+
+def test_parseInstance():
+    instance = parseInstance("2 3\n0 4 1 3 2 5\n2 4 1 3 0 4\n\n")
+    assert (instance.numJobs, instance.numMachines) == (2, 3)
+    assert instance.toJobs() == [[(0, 4), (1, 3), (2, 5)], [(2, 4), (1, 3), (0, 4)]]
+
+
+def test_loadInstanceMatchesReadJobs():
+    path = os.path.join(instances, "abz5")
+    assert loadInstance(path, sidecar=False).toJobs() == readJobs(path)
+
+
+def test_sidecar(tmp_path):
+    path = str(tmp_path / "la01")
+    with open(os.path.join(instances, "la01")) as source, open(path, "w") as f:
+        f.write(source.read())
+
+    assert not os.path.exists(sidecarPath(path))
+    jobs = loadInstance(path).toJobs()
+    assert os.path.exists(sidecarPath(path))
+    # the second load memory-maps the sidecar
+    assert loadInstance(path).toJobs() == jobs
+
+    loadInstance(path, sidecar=False)
+    os.remove(sidecarPath(path))
+    loadInstance(path, sidecar=False)
+    assert not os.path.exists(sidecarPath(path))
+
+
+def test_costBatch(instance):
+    jobs = instance("abz5")
+    schedules = [randomSchedule(len(jobs), len(jobs[0])) for _ in range(10)]
+    assert cost_batch(Instance.fromJobs(jobs), schedules).tolist() == [cost(jobs, s) for s in schedules]
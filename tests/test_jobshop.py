@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from jobshop import PartialEvaluator, checkSchedule, cost, costPartial, makeEvaluator, normalizeSchedule, randomSchedule
+
+
+def partialSchedules(jobs, count=50):
+    random.seed(0)
+    j = len(jobs)
+    m = len(jobs[0])
+    return [[random.randrange(j) for _ in range(j*m + random.randint(-5, 5))] for _ in range(count)]
+
+
+def test_normalizeScheduleIsValid(instance):
+    jobs = instance("abz5")
+    valid = sorted(randomSchedule(len(jobs), len(jobs[0])))
+    for rule in ("block", "mwr", "est"):
+        for s in partialSchedules(jobs):
+            assert sorted(normalizeSchedule(jobs, s, rule)) == valid
+
+
+def test_normalizeScheduleBlock(instance):
+    jobs = instance("vorlesungsbeispiel")
+    # surplus instructions are ignored, missing tasks are appended job by job
+    assert normalizeSchedule(jobs, [2, 2, 2, 2, 0]) == [2, 2, 2, 0, 0, 0, 1, 1, 1]
+    assert costPartial(jobs, [2, 2, 2, 2, 0]) == cost(jobs, [2, 2, 2, 0, 0, 0, 1, 1, 1])
+
+
+@pytest.mark.parametrize("rule", ["block", "mwr", "est"])
+def test_costPartial(instance, rule):
+    jobs = instance("abz5")
+    evaluator = PartialEvaluator(jobs, rule)
+    for s in partialSchedules(jobs):
+        normalized = []
+        c = costPartial(jobs, s, rule, normalized)
+        assert normalized == normalizeSchedule(jobs, s, rule)
+        assert c == cost(jobs, normalized)
+        assert evaluator.evaluate(s) == c
+        assert evaluator.decode(s) == normalized
+
+
+def test_partialEvaluatorOnSchedules(instance):
+    jobs = instance("la01")
+    evaluator = makeEvaluator(jobs, "partial", 100)
+    schedules = [randomSchedule(len(jobs), len(jobs[0])) for _ in range(10)]
+    assert evaluator.evaluateBatch(schedules) == [cost(jobs, s) for s in schedules]
+    assert evaluator.misses == 10
+
+
+def test_checkSchedule():
+    checkSchedule(2, 2, [0, 1, 1, 0])
+    for schedule in ([0, 1, 1], [0, 1, 1, 2], [0, 1, 1, -1], [0, 1, 1, 0.0], [0, 1, 1, True]):
+        with pytest.raises(ValueError):
+            checkSchedule(2, 2, schedule)
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from jobshop import cost, geneticSearch, localSearch, randomSchedule
+from jobshop.localSearch import moves, operators
+
+
+def neighbors(schedule, kind):
+    """Yield all neighbors of schedule in the neighbourhood kind."""
+    for a, b in moves(len(schedule), kind, randomOrder=False):
+        neighbor = schedule[:]
+        if operators[kind](neighbor, a, b) is not None:
+            yield neighbor
+
+
+def test_moves():
+    assert len(list(moves(10, "swap"))) == 45
+    assert len(list(moves(10, "insertion"))) == 90
+    assert sorted(moves(10, "reversal")) == sorted(moves(10, "swap", randomOrder=False))
+    assert all(0 < abs(a - b) <= 2 for a, b in moves(10, "insertion", maxDistance=2))
+
+
+@pytest.mark.parametrize("strategy", ["first", "best"])
+def test_localOptimum(instance, strategy):
+    jobs = instance("la01")
+    random.seed(0)
+    schedule = randomSchedule(len(jobs), len(jobs[0]))
+    c, result = localSearch(jobs, schedule[:], strategy=strategy)
+
+    assert sorted(result) == sorted(schedule)
+    assert c == cost(jobs, result) <= cost(jobs, schedule)
+    for kind in operators:
+        assert min(cost(jobs, n) for n in neighbors(result, kind)) >= c
+
+
+def test_maxSteps(instance):
+    jobs = instance("abz5")
+    random.seed(1)
+    schedule = randomSchedule(len(jobs), len(jobs[0]))
+    c, result = localSearch(jobs, schedule, "swap", maxSteps=1)
+    assert c == cost(jobs, result) < cost(jobs, schedule)
+    assert sum(x != y for x, y in zip(result, schedule)) == 2
+
+
+def test_mutateLocalSearch(instance):
+    jobs = instance("abz5")
+    random.seed(2)
+    for _ in range(10):
+        schedule = randomSchedule(len(jobs), len(jobs[0]))
+        s = schedule[:]
+        geneticSearch.mutate_localSearch(jobs, s)
+        assert sorted(s) == sorted(schedule)
+        assert cost(jobs, s) <= cost(jobs, schedule)
@@ -0,0 +1,28 @@
+import random
+
+import pytest
+
+from jobshop import checkSchedule, cost, dispatch, remapSchedule, reoptimize
+
+
+def test_remapSchedule(instance):
+    jobs = instance("la01")
+    previous = dispatch(instance("abz5"))
+    schedule = remapSchedule(jobs, previous)
+    checkSchedule(10, 5, schedule)
+    assert remapSchedule(jobs, schedule) == schedule
+
+
+@pytest.mark.parametrize("algorithm", ["TS", "SA"])
+def test_reoptimize(instance, algorithm):
+    jobs = instance("la01")
+    previous = dispatch(jobs)
+    random.seed(0)
+    best, schedule = reoptimize(jobs, previous, algorithm, maxTime=0.2)
+    assert best == cost(jobs, schedule) <= cost(jobs, previous)
+
+
+def test_reoptimizeRejectsDR(instance):
+    jobs = instance("la01")
+    with pytest.raises(ValueError):
+        reoptimize(jobs, dispatch(jobs), "DR", maxTime=0.2)
@@ -0,0 +1,146 @@
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from jobshop import cost, parseInstance
+from jobshop import service as solverService
+from jobshop.service import SolverService, _Handler, _loadJobs
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer
+
+instances = os.path.join(os.path.dirname(__file__), "..", "instances")
+
+
+@pytest.fixture
+def service():
+    service = SolverService(workers=1, keep=2)
+    yield service
+    service.close()
+
+
+def wait(service, job, states, timeout=10):
+    t0 = time.time()
+    while service.status(job)["state"] not in states:
+        assert time.time() - t0 < timeout
+        time.sleep(0.02)
+    return time.time() - t0
+
+
+def test_solve(service, instance):
+    job = service.submit(os.path.join(instances, "la01"), algorithm="DR", maxTime=0.2, seed=1)
+    wait(service, job, ("done",))
+    status = service.status(job)
+    assert status["best"] == cost(instance("la01"), status["schedule"])
+
+
+def test_cancelRunning(service):
+    job = service.submit(os.path.join(instances, "abz5"), algorithm="TS", maxTime=60, seed=1)
+    wait(service, job, ("running",))
+    time.sleep(0.5)
+    assert service.cancel(job)
+    assert wait(service, job, ("cancelled",)) < 1
+    assert service.status(job)["best"] is not None
+    assert len(service.cancelled) == 0
+
+
+def test_cancelFirstGeneration(service):
+    random.seed(0)
+    text = "100 20\n" + "".join(" ".join("{} {}".format(machine, random.randint(1, 99))
+            for machine in random.sample(range(20), 20)) + "\n" for _ in range(100))
+    job = service.submit(text=text, algorithm="GS", maxTime=60, seed=1, options={"populationSize": 3000})
+    # the best initial individual is reported before the first generation
+    wait(service, job, ("running",))
+    while service.status(job)["best"] is None:
+        time.sleep(0.01)
+    assert service.status(job)["evaluations"] == 3000
+    assert service.cancel(job)
+    wait(service, job, ("cancelled", "failed"))
+    status = service.status(job)
+    assert status["state"] == "cancelled"
+    assert status["best"] == cost(parseInstance(text).toJobs(), status["schedule"])
+
+
+def test_evictFinishedJobs(service):
+    path = os.path.join(instances, "vorlesungsbeispiel")
+    jobs = [service.submit(path, algorithm="DR", maxTime=0.1) for _ in range(4)]
+    wait(service, jobs[-1], ("done",))
+    assert [status["id"] for status in service.list()] == jobs[2:]
+    assert service.status(jobs[0]) is None
+
+
+def test_http(service):
+    handler = type("Handler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}/jobs".format(server.server_address[1])
+
+    def request(method, path="", body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url + path, data, method=method)) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    try:
+        code, body = request("POST", body={"instance": os.path.join(instances, "la01"),
+                "algorithm": "DR", "maxTime": 0.2})
+        assert code == 201
+        job = body["id"]
+        wait(service, job, ("done",))
+        assert request("GET", "/{}".format(job))[1]["state"] == "done"
+        assert request("GET")[1][0]["id"] == job
+        assert request("GET", "/999")[0] == 404
+        assert request("DELETE", "/999")[0] == 404
+        assert request("POST", body={"instance": "no/such/file"})[0] == 400
+        assert request("POST", body={"instance": os.path.join(instances, "la01"), "algorithm": "XX"})[0] == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_submitChecksMaxTimeAndSeed(service):
+    path = os.path.join(instances, "vorlesungsbeispiel")
+    for maxTime in (None, "10", 0, -1, True, float("nan")):
+        with pytest.raises(ValueError):
+            service.submit(path, algorithm="DR", maxTime=maxTime)
+    for seed in ("1", 1.5, True):
+        with pytest.raises(ValueError):
+            service.submit(path, algorithm="DR", seed=seed)
+    # rejected jobs are not registered
+    assert service.list() == []
+
+
+def test_submitChecksInitial(service, instance):
+    path = os.path.join(instances, "vorlesungsbeispiel")
+    with pytest.raises(ValueError):
+        service.submit(path, algorithm="DR", options={"initial": [0, 0, 1, 2, 1, 1, 2, 2, 0]})
+    for initial in ([0, 0, 1, 2, 1, 1, 2, 2], [0, 0, 1, 2, 1, 1, 2, 2, 3], [0, 0, 1, 2, 1, 1, 2, 2, "0"],
+            [[0, 0, 1, 2, 1, 1, 2, 2, 0], [0]], "random", {}):
+        with pytest.raises(ValueError):
+            service.submit(path, algorithm="SA", options={"initial": initial})
+
+    schedule = [0, 0, 1, 2, 1, 1, 2, 2, 0]
+    job = service.submit(path, algorithm="TS", maxTime=0.2, options={"initial": [schedule]})
+    wait(service, job, ("done",))
+    assert service.status(job)["best"] <= cost(instance("vorlesungsbeispiel"), schedule)
+
+
+def test_instanceCacheIsBounded(monkeypatch, instance):
+    cache = OrderedDict()
+    monkeypatch.setattr(solverService, "_worker", (None, None, (cache, 2)))
+    texts = ["1 1\n0 {}\n".format(time) for time in range(3)]
+    assert _loadJobs(None, texts[0]) == [[(0, 0)]]
+    _loadJobs(None, texts[1])
+    _loadJobs(None, texts[0])
+    _loadJobs(None, texts[2])
+    # the least recently used instance is dropped
+    assert [key[1] for key in cache] == [hash(texts[0]), hash(texts[2])]
+    assert _loadJobs(os.path.join(instances, "la01"), None) == instance("la01")
+    assert len(cache) == 2
@@ -0,0 +1,37 @@
+import itertools
+import multiprocessing
+import random
+
+from jobshop import cost, lowerBound, randomSchedule, simulatedAnnealingSearch
+from jobshop.events import MemorySink
+from jobshop.simulatedAnnealing import _initWorker, _initial, parallelRestarts
+
+
+def test_restartsStartFromInitialThenRandom():
+    initial = [[0, 1, 1, 0], [1, 0, 0, 1]]
+    starts = [_initial(initial, i) for i in range(4)]
+    assert starts == [[0, 1, 1, 0], [1, 0, 0, 1], None, None]
+    assert starts[0] is not initial[0]
+    assert _initial(None, 0) is None
+
+
+def test_parallelRestarts(instance):
+    jobs = instance("abz5")
+    random.seed(0)
+    sink = MemorySink()
+    best, schedule = simulatedAnnealingSearch(jobs, maxTime=1, termination=2, halting=5, workers=2, callback=sink)
+    assert sorted(schedule) == sorted(randomSchedule(10, 10))
+    assert lowerBound(jobs) <= best == cost(jobs, schedule) == sink.events[-1].best
+
+
+def test_parallelRestartsDependOnlyOnSeed(instance):
+    jobs = instance("la01")
+    params = dict(T=200, termination=2, halting=3, mode="random", decrease=0.8)
+    with multiprocessing.Pool(2, _initWorker, (jobs,)) as pool:
+        first = list(itertools.islice(parallelRestarts(pool, 2, 7, params), 4))
+        again = list(itertools.islice(parallelRestarts(pool, 3, 7, params), 4))
+        resumed = list(itertools.islice(parallelRestarts(pool, 2, 7, params, start=2), 2))
+    assert first == again
+    assert resumed == first[2:]
+    for c, schedule in first:
+        assert c == cost(jobs, schedule)